@@ -0,0 +1,233 @@
+import json
+import subprocess
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+import cv2
+import numpy as np
+
+
+def redact_url(source) -> str:
+    """URL do stream sem usuário e senha, para nomes de threads e logs"""
+    source = str(source)
+    parts = urlsplit(source)
+    if '@' not in parts.netloc:
+        return source
+    return parts._replace(netloc=parts.netloc.rpartition('@')[2]).geturl()
+
+
+class LatestFrameReader:
+    """
+    Leitor de stream que decodifica em uma thread própria e mantém apenas o
+    frame mais recente. Frames que não foram consumidos a tempo são
+    descartados, evitando que o buffer do OpenCV/FFmpeg acumule atraso.
+    Expõe a mesma interface básica do cv2.VideoCapture (isOpened, read, get, release).
+    """
+
+    def __init__(self, source, name: str = None):
+        """
+        Args:
+            source: URL, caminho ou índice do stream
+            name: Identificação da thread de captura (ex.: camera_id); por
+                padrão a URL sem credenciais
+        """
+        self.source = source
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self._frame = None
+        self._frame_seq = 0
+        self._read_seq = 0
+        self._ended = False
+        self._timestamps = deque(maxlen=50)
+        self._condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        if self._open():
+            self._thread = threading.Thread(
+                target=self._run,
+                name=f"capture-{name or redact_url(source)}",
+                daemon=True
+            )
+            self._thread.start()
+
+    def _open(self) -> bool:
+        self._cap = cv2.VideoCapture(self.source)
+        if not self._cap.isOpened():
+            return False
+        # Mantém o buffer interno do backend o menor possível
+        self._cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        return True
+
+    def _grab(self):
+        return self._cap.read()
+
+    def _close(self):
+        self._cap.release()
+
+    def isOpened(self) -> bool:
+        return self._cap.isOpened()
+
+    def get(self, prop_id):
+        return self._cap.get(prop_id)
+
+    @property
+    def capture_fps(self) -> float:
+        """FPS efetivo de decodificação nos últimos frames"""
+        timestamps = list(self._timestamps)
+        if len(timestamps) < 2 or timestamps[-1] == timestamps[0]:
+            return 0.0
+        return (len(timestamps) - 1) / (timestamps[-1] - timestamps[0])
+
+    def stats(self) -> dict:
+        return {
+            'frames_captured': self.frames_captured,
+            'frames_dropped': self.frames_dropped,
+            'capture_fps': self.capture_fps,
+        }
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            success, frame = self._grab()
+            if not success:
+                break
+
+            with self._condition:
+                if self._frame_seq > self._read_seq:
+                    # O frame anterior nunca foi lido: descarta
+                    self.frames_dropped += 1
+                self._frame = frame
+                self._frame_seq += 1
+                self.frames_captured += 1
+                self._timestamps.append(time.monotonic())
+                self._condition.notify_all()
+
+        with self._condition:
+            self._ended = True
+            self._condition.notify_all()
+
+    def read(self, timeout: float = 10.0):
+        """
+        Retorna o frame mais recente ainda não lido
+        Returns:
+            Tupla (success, frame), como cv2.VideoCapture.read
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._frame_seq > self._read_seq or self._ended,
+                timeout
+            )
+            if self._frame_seq == self._read_seq:
+                return False, None
+            self._read_seq = self._frame_seq
+            return True, self._frame
+
+    def release(self):
+        """Encerra a thread de captura e libera o stream"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._close()
+
+
+class FFmpegFrameReader(LatestFrameReader):
+    """
+    Leitor de stream com uma única sessão ffmpeg persistente que entrega
+    frames BGR crus pelo stdout. A conexão (handshake RTSP, detecção do
+    codec) acontece uma vez por sessão, não a cada frame. Com `fps`, o
+    próprio ffmpeg entrega apenas a taxa de frames necessária.
+    """
+
+    def __init__(self, source, fps: float = None, ffmpeg: str = 'ffmpeg', ffprobe: str = 'ffprobe',
+                 name: str = None):
+        """
+        Args:
+            source: URL ou caminho do stream
+            fps: Taxa de frames entregue (None = taxa original do stream)
+            ffmpeg: Executável do ffmpeg
+            ffprobe: Executável do ffprobe, usado para descobrir a resolução
+            name: Identificação da thread de captura, como em LatestFrameReader
+        """
+        self.fps = fps
+        self.ffmpeg = ffmpeg
+        self.ffprobe = ffprobe
+        self.width = self.height = 0
+        self.source_fps = 0.0
+        self._process = None
+        super().__init__(source, name)
+
+    def _probe(self):
+        result = subprocess.run(
+            [self.ffprobe, '-v', 'error', '-select_streams', 'v:0',
+             '-show_entries', 'stream=width,height,avg_frame_rate', '-of', 'json', str(self.source)],
+            capture_output=True, timeout=30, check=True
+        )
+        stream = json.loads(result.stdout)['streams'][0]
+        numerator, _, denominator = stream.get('avg_frame_rate', '0/1').partition('/')
+        self.width, self.height = int(stream['width']), int(stream['height'])
+        self.source_fps = float(numerator) / float(denominator) if float(denominator or 0) else 0.0
+
+    def _open(self) -> bool:
+        try:
+            self._probe()
+        except (OSError, subprocess.SubprocessError, ValueError, KeyError, IndexError) as e:
+            print(f"Erro ao inspecionar o stream {redact_url(self.source)}: {str(e)}")
+            return False
+
+        command = [self.ffmpeg, '-hide_banner', '-loglevel', 'error', '-nostdin']
+        if str(self.source).startswith('rtsp://'):
+            command += ['-rtsp_transport', 'tcp']
+        command += ['-i', str(self.source), '-an']
+        if self.fps:
+            command += ['-vf', f"fps={self.fps}"]
+        command += ['-f', 'rawvideo', '-pix_fmt', 'bgr24', 'pipe:1']
+
+        try:
+            self._process = subprocess.Popen(
+                command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, stdin=subprocess.DEVNULL
+            )
+        except OSError as e:
+            print(f"Erro ao iniciar o ffmpeg: {str(e)}")
+            return False
+        return True
+
+    def _grab(self):
+        frame_size = self.width * self.height * 3
+        buffer = bytearray(frame_size)
+        view = memoryview(buffer)
+        received = 0
+        while received < frame_size:
+            count = self._process.stdout.readinto(view[received:])
+            if not count:
+                return False, None
+            received += count
+        return True, np.frombuffer(buffer, dtype=np.uint8).reshape(self.height, self.width, 3)
+
+    def _close(self):
+        if self._process is None:
+            return
+        if self._process.poll() is None:
+            self._process.kill()
+        self._process.stdout.close()
+        self._process.wait()
+
+    def isOpened(self) -> bool:
+        return self._process is not None and not self._ended
+
+    def get(self, prop_id):
+        if prop_id == cv2.CAP_PROP_FPS:
+            return self.fps or self.source_fps
+        if prop_id == cv2.CAP_PROP_FRAME_WIDTH:
+            return self.width
+        if prop_id == cv2.CAP_PROP_FRAME_HEIGHT:
+            return self.height
+        return 0.0
+
+    def release(self):
+        # Encerra o ffmpeg antes de aguardar a thread, que pode estar bloqueada no pipe
+        self._stop_event.set()
+        if self._process is not None and self._process.poll() is None:
+            self._process.kill()
+        super().release()
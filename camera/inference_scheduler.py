@@ -0,0 +1,138 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from django.conf import settings
+
+
+class InferenceRequest:
+    def __init__(self, image, predict_kwargs: dict):
+        self.image = image
+        self.predict_kwargs = predict_kwargs
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+
+
+class BatchInferenceScheduler:
+    """
+    Agrupa frames de todas as câmeras ativas em micro-lotes e executa uma
+    única inferência por lote no modelo compartilhado.
+    O lote é fechado ao atingir `max_batch_size` ou após `max_wait_ms`
+    desde a chegada do primeiro frame.
+    """
+
+    def __init__(self, handle, max_batch_size: int = 8, max_wait_ms: float = 20):
+        self.handle = handle
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._metrics_lock = threading.Lock()
+        self._batch_sizes = deque(maxlen=1000)
+        self._queue_latencies = deque(maxlen=1000)
+        self._batches = 0
+        self._frames = 0
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f"inference-scheduler-{handle.model_path}",
+            daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, image, **predict_kwargs) -> Future:
+        """Enfileira um frame; o Future recebe o DetectionResult dele"""
+        request = InferenceRequest(image, predict_kwargs)
+        self._queue.put(request)
+        return request.future
+
+    def _collect_batch(self):
+        batch = [self._queue.get()]
+        deadline = batch[0].enqueued_at + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            started_at = time.monotonic()
+
+            # Frames com parâmetros diferentes (ex.: confiança) não podem
+            # compartilhar a mesma chamada ao modelo
+            groups = {}
+            for request in batch:
+                key = tuple(sorted(request.predict_kwargs.items()))
+                groups.setdefault(key, []).append(request)
+
+            for requests in groups.values():
+                try:
+                    results = self.handle.predict(
+                        [request.image for request in requests],
+                        **requests[0].predict_kwargs
+                    )
+                    for request, result in zip(requests, results):
+                        request.future.set_result(result)
+                except Exception as e:
+                    for request in requests:
+                        request.future.set_exception(e)
+
+            with self._metrics_lock:
+                self._batches += 1
+                self._frames += len(batch)
+                self._batch_sizes.append(len(batch))
+                self._queue_latencies.extend(
+                    started_at - request.enqueued_at for request in batch
+                )
+
+    def metrics(self) -> dict:
+        """Métricas recentes para ajuste de max_batch_size/max_wait_ms"""
+        with self._metrics_lock:
+            sizes = list(self._batch_sizes)
+            latencies = sorted(self._queue_latencies)
+
+        avg_batch_size = sum(sizes) / len(sizes) if sizes else 0
+        return {
+            'model_path': self.handle.model_path,
+            'device': self.handle.device,
+            'backend': self.handle.backend,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+            'batches': self._batches,
+            'frames': self._frames,
+            'pending': self._queue.qsize(),
+            'avg_batch_size': avg_batch_size,
+            'batch_fill_rate': avg_batch_size / self.max_batch_size,
+            'avg_queue_latency_ms': sum(latencies) / len(latencies) * 1000 if latencies else 0,
+            'p95_queue_latency_ms': latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0,
+        }
+
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(handle) -> BatchInferenceScheduler:
+    """Retorna o agendador do modelo, criando-o no primeiro uso"""
+    with _schedulers_lock:
+        scheduler = _schedulers.get(handle)
+        if scheduler is None:
+            scheduler = BatchInferenceScheduler(
+                handle,
+                max_batch_size=settings.INFERENCE_MAX_BATCH_SIZE,
+                max_wait_ms=settings.INFERENCE_MAX_WAIT_MS
+            )
+            _schedulers[handle] = scheduler
+        return scheduler
+
+
+def scheduler_metrics() -> list:
+    with _schedulers_lock:
+        schedulers = list(_schedulers.values())
+    return [scheduler.metrics() for scheduler in schedulers]
@@ -0,0 +1,533 @@
+import atexit
+import ipaddress
+import itertools
+import os
+import queue
+import socket
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from multiprocessing import get_context, shared_memory
+from multiprocessing.managers import BaseManager
+from typing import List
+
+import numpy as np
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.crypto import salted_hmac
+
+from .object_detector import DetectionResult, get_backend_class
+
+# Encerra o loop de um worker ou a thread de respostas do cliente
+STOP = None
+# Blocos de memória compartilhada mantidos abertos por worker (os mais antigos são fechados)
+WORKER_BLOCK_CACHE = 256
+
+
+def parse_address(address: str):
+    """'host:porta' -> (host, porta)"""
+    host, _, port = address.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+def is_loopback(host: str) -> bool:
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(host)).is_loopback
+    except (OSError, ValueError):
+        return False
+
+
+def service_authkey(address) -> bytes:
+    """
+    Chave do servidor de filas (INFERENCE_SERVICE_AUTHKEY)
+    Args:
+        address: Tupla (host, porta) do serviço
+    Raises:
+        ImproperlyConfigured: Endereço fora do loopback sem chave definida
+    """
+    if settings.INFERENCE_SERVICE_AUTHKEY:
+        return settings.INFERENCE_SERVICE_AUTHKEY.encode()
+    if not is_loopback(address[0]):
+        raise ImproperlyConfigured(
+            f"INFERENCE_SERVICE_AUTHKEY é obrigatória para o serviço de inferência em {address[0]}:{address[1]}"
+        )
+    # Apenas no loopback: chave derivada, nunca o próprio SECRET_KEY
+    return salted_hmac('camera.inference_service', 'authkey').hexdigest().encode()
+
+
+def split_cores(workers: int, cores: List[int] = None) -> List[List[int]]:
+    """Divide os núcleos disponíveis em grupos contíguos, um por worker"""
+    cores = sorted(cores if cores is not None else os.sched_getaffinity(0))
+    workers = max(1, min(workers, len(cores)))
+    size, extra = divmod(len(cores), workers)
+    groups, start = [], 0
+    for index in range(workers):
+        end = start + size + (1 if index < extra else 0)
+        groups.append(cores[start:end])
+        start = end
+    return groups
+
+
+def attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """Abre um bloco criado por outro processo sem assumir a responsabilidade de removê-lo"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13: o resource_tracker removeria o bloco ao fim do worker
+        from multiprocessing import resource_tracker
+        block = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(block._name, 'shared_memory')
+        return block
+
+
+class InferenceServiceManager(BaseManager):
+    """Acesso às filas do serviço de inferência por endereço TCP + authkey"""
+
+
+InferenceServiceManager.register('get_request_queue')
+InferenceServiceManager.register('get_response_queue')
+InferenceServiceManager.register('close_client')
+
+
+class InferenceQueueServer(BaseManager):
+    """Lado servidor das filas (registro separado do InferenceServiceManager)"""
+
+
+def serve_queues(address, authkey: bytes):
+    """
+    Inicia, em uma thread, o servidor das filas de pedidos e de respostas
+    Returns:
+        Tupla (servidor do BaseManager, fila de pedidos local)
+    """
+    request_queue = queue.Queue()
+    response_queues = {}
+    lock = threading.Lock()
+
+    def get_request_queue():
+        return request_queue
+
+    def get_response_queue(client_id):
+        with lock:
+            return response_queues.setdefault(client_id, queue.Queue())
+
+    def close_client(client_id):
+        with lock:
+            response_queues.pop(client_id, None)
+
+    InferenceQueueServer.register('get_request_queue', callable=get_request_queue)
+    InferenceQueueServer.register('get_response_queue', callable=get_response_queue)
+    InferenceQueueServer.register('close_client', callable=close_client)
+
+    server = InferenceQueueServer(address=address, authkey=authkey).get_server()
+    threading.Thread(target=server.serve_forever, name='inference-service-queues', daemon=True).start()
+    return server, request_queue
+
+
+def connect(address, authkey: bytes) -> InferenceServiceManager:
+    manager = InferenceServiceManager(address=address, authkey=authkey)
+    manager.connect()
+    return manager
+
+
+def worker_main(index: int, cores: List[int], address, authkey: bytes,
+                model_path: str, device: str, precision: str, backend: str):
+    """
+    Loop de um worker: fixa o processo nos núcleos recebidos, carrega sua
+    própria cópia do modelo e atende pedidos lendo os frames direto da
+    memória compartilhada do cliente.
+    """
+    import django
+    django.setup()
+
+    if cores and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cores)
+    threads = max(len(cores), 1)
+    if backend == 'torch':
+        import torch
+        torch.set_num_threads(threads)
+        model = get_backend_class(backend)(model_path, device, precision)
+    else:
+        model = get_backend_class(backend)(model_path, device, precision, threads=threads)
+    print(f"Worker de inferência {index} pronto (núcleos {cores}, {backend})")
+
+    manager = connect(address, authkey)
+    requests = manager.get_request_queue()
+    response_queues = {}
+    blocks = OrderedDict()
+
+    try:
+        while True:
+            request = requests.get()
+            if request is STOP:
+                break
+            client_id, request_id, block_name, shape, dtype, predict_kwargs = request
+            try:
+                block = blocks.get(block_name)
+                if block is None:
+                    block = blocks[block_name] = attach_shared_memory(block_name)
+                    # Blocos descartados pelos clientes (timeouts) não ficam mapeados para sempre
+                    if len(blocks) > WORKER_BLOCK_CACHE:
+                        blocks.popitem(last=False)[1].close()
+                else:
+                    blocks.move_to_end(block_name)
+                # View sobre o buffer do cliente: nenhum frame é copiado ou serializado
+                frame = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+                detections = model.detect([frame], **predict_kwargs)[0]
+                del frame
+                response = (request_id, detections.class_ids, detections.confidences,
+                            detections.boxes, detections.names, None)
+            except Exception as e:
+                response = (request_id, None, None, None, None, str(e))
+
+            responses = response_queues.get(client_id)
+            if responses is None:
+                responses = response_queues[client_id] = manager.get_response_queue(client_id)
+            responses.put(response)
+    except (KeyboardInterrupt, EOFError, ConnectionError):
+        # Ctrl+C chega a todo o grupo de processos; o serviço principal faz o encerramento
+        pass
+    finally:
+        for block in blocks.values():
+            block.close()
+
+
+class InferenceService:
+    """
+    Serviço de inferência separado dos workers web. Inicia N processos,
+    cada um com seu modelo e seu conjunto de núcleos, que consomem uma
+    fila única de pedidos. Os frames trafegam por memória compartilhada;
+    pelas filas passam apenas metadados e as detecções.
+    """
+
+    def __init__(self, address, authkey: bytes, workers: int = 0, model_path: str = None,
+                 device: str = None, precision: str = None, backend: str = None):
+        """
+        Args:
+            address: Tupla (host, porta) do servidor de filas
+            authkey: Chave do servidor de filas (ver service_authkey)
+            workers: Quantidade de processos (0 = um por núcleo disponível)
+        Raises:
+            ImproperlyConfigured: Chave vazia
+        """
+        if not authkey:
+            raise ImproperlyConfigured('O serviço de inferência não inicia sem authkey')
+        backend = backend or settings.INFERENCE_BACKEND
+        self.address = address
+        self.authkey = authkey
+        self.model_path = model_path or (
+            settings.ONNX_MODEL_PATH if backend == 'onnx' else settings.YOLO_MODEL_PATH
+        )
+        self.device = device or settings.YOLO_DEVICE or 'cpu'
+        self.precision = precision or settings.YOLO_PRECISION
+        self.backend = backend
+        self.core_groups = split_cores(workers or len(os.sched_getaffinity(0)))
+        self._server = None
+        self._request_queue = None
+        self._processes = []
+
+    def start(self):
+        self._server, self._request_queue = serve_queues(self.address, self.authkey)
+        # spawn: cada worker inicia um interpretador limpo (sem threads herdadas)
+        context = get_context('spawn')
+        for index, cores in enumerate(self.core_groups):
+            process = context.Process(
+                target=worker_main,
+                args=(index, cores, self.address, self.authkey, self.model_path,
+                      self.device, self.precision, self.backend),
+                name=f"inference-worker-{index}",
+                daemon=True
+            )
+            process.start()
+            self._processes.append(process)
+
+    def wait(self):
+        """Bloqueia até que algum worker termine"""
+        while all(process.is_alive() for process in self._processes):
+            time.sleep(1)
+
+    def stop(self):
+        for _ in self._processes:
+            self._request_queue.put(STOP)
+        for process in self._processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        if self._server is not None:
+            self._server.stop_event.set()
+
+
+class InferenceServiceClient:
+    """
+    Cliente do serviço de inferência usado pelo processo web. Copia cada
+    frame para um bloco de memória compartilhada reaproveitável (até
+    max_blocks blocos) e aguarda as detecções em uma thread de respostas.
+    Se a conexão cai (ex.: serviço reiniciado), os pedidos pendentes falham
+    e o próximo pedido reconecta. Expõe predict() como o ModelHandle,
+    podendo substituí-lo no ObjectDetector.
+
+    Os proxies do multiprocessing guardam um socket por thread e endereço.
+    Por isso as filas do serviço só são usadas pelas threads de envio e de
+    respostas de cada conexão: uma reconexão cria um manager e threads novos
+    e nunca reaproveita um socket da conexão perdida.
+    """
+
+    backend = 'remote'
+    # Intervalo mínimo (s) entre tentativas de reconexão
+    RECONNECT_INTERVAL = 1.0
+
+    def __init__(self, address, authkey: bytes, timeout: float = 10.0, max_blocks: int = 64):
+        """
+        Args:
+            timeout: Espera máxima (s) por uma resposta ou por um bloco livre
+            max_blocks: Blocos de memória compartilhada mantidos pelo cliente
+        """
+        self.address = address
+        self.authkey = authkey
+        self.model_path = f"{address[0]}:{address[1]}"
+        self.timeout = timeout
+        self.max_blocks = max_blocks
+        self.client_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.reconnects = 0
+        self.connected = False
+        self.closed = False
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        # Sinaliza blocos devolvidos ou destruídos a quem aguarda em _acquire_block
+        self._block_freed = threading.Condition(self._lock)
+        self._connect_lock = threading.Lock()
+        self._last_connect = None
+        self._free_blocks = {}
+        self._blocks = []
+        self._pending = {}
+        self._latencies = deque(maxlen=100)
+        self._connect()
+
+    def _connect(self):
+        """Conecta às filas do serviço e inicia as threads de envio e de respostas"""
+        self._last_connect = time.monotonic()
+        manager = connect(self.address, self.authkey)
+        self._manager = manager
+        requests = manager.get_request_queue()
+        self._responses = manager.get_response_queue(self.client_id)
+        self._outbox = queue.Queue()
+        self.connected = True
+        threading.Thread(
+            target=self._send, args=(self._outbox, requests, self._responses),
+            name='inference-client-send', daemon=True
+        ).start()
+        self._thread = threading.Thread(
+            target=self._receive, args=(self._responses,), name='inference-client', daemon=True
+        )
+        self._thread.start()
+
+    def _reconnect(self):
+        with self._connect_lock:
+            if self.connected:
+                return
+            if self.closed:
+                raise ConnectionError('Cliente do serviço de inferência encerrado')
+            if time.monotonic() - self._last_connect < self.RECONNECT_INTERVAL:
+                raise ConnectionError(f"Serviço de inferência indisponível em {self.model_path}")
+            try:
+                self._connect()
+            except (OSError, EOFError) as e:
+                raise ConnectionError(f"Serviço de inferência indisponível em {self.model_path}: {e!r}")
+            self.reconnects += 1
+            print(f"Reconectado ao serviço de inferência em {self.model_path}")
+
+    def _disconnect(self, error):
+        """Marca a conexão como perdida e falha todos os pedidos pendentes"""
+        self.connected = False
+        error = str(error) or type(error).__name__
+        # Encerra a thread de envio desta conexão (e a de respostas, se ainda ativa)
+        self._outbox.put(STOP)
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            for future, block, _ in pending.values():
+                self._destroy_block(block)
+            self.errors += len(pending)
+        for future, _, _ in pending.values():
+            future.set_exception(ConnectionError(f"Conexão com o serviço de inferência perdida: {error}"))
+        if not self.closed:
+            print(f"Conexão com o serviço de inferência perdida ({error}); {len(pending)} pedidos falharam")
+
+    def _acquire_block(self, size: int) -> shared_memory.SharedMemory:
+        deadline = time.monotonic() + self.timeout
+        with self._lock:
+            while True:
+                free = self._free_blocks.setdefault(size, [])
+                if free:
+                    return free.pop()
+                if len(self._blocks) >= self.max_blocks:
+                    # Abre espaço descartando um bloco livre de outro tamanho
+                    other = next((blocks for blocks in self._free_blocks.values() if blocks), None)
+                    if other:
+                        self._destroy_block(other.pop())
+                if len(self._blocks) < self.max_blocks:
+                    block = shared_memory.SharedMemory(create=True, size=size)
+                    self._blocks.append(block)
+                    return block
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError('Nenhum bloco de memória compartilhada livre para o serviço de inferência')
+                self._block_freed.wait(remaining)
+
+    def _release_block(self, block: shared_memory.SharedMemory):
+        with self._lock:
+            self._free_blocks.setdefault(block.size, []).append(block)
+            self._block_freed.notify()
+
+    def _destroy_block(self, block: shared_memory.SharedMemory):
+        """Remove um bloco do pool (chamado com self._lock adquirido)"""
+        if block in self._blocks:
+            self._blocks.remove(block)
+        block.close()
+        block.unlink()
+        self._block_freed.notify()
+
+    def submit(self, image: np.ndarray, **predict_kwargs) -> Future:
+        """
+        Envia um frame ao serviço; o Future recebe o DetectionResult dele
+        Args:
+            predict_kwargs: Parâmetros de InferenceBackend.detect (conf, imgsz, classes)
+        """
+        if not self.connected:
+            self._reconnect()
+        image = np.ascontiguousarray(image)
+        block = self._acquire_block(image.nbytes)
+        np.ndarray(image.shape, dtype=image.dtype, buffer=block.buf)[...] = image
+
+        future = Future()
+        request_id = future.request_id = next(self._ids)
+        with self._lock:
+            self._pending[request_id] = (future, block, time.monotonic())
+            self.requests += 1
+        # Uma falha no envio falha o Future com ConnectionError (ver _send)
+        self._outbox.put((self.client_id, request_id, block.name,
+                          image.shape, image.dtype.str, predict_kwargs))
+        return future
+
+    def abandon(self, future: Future):
+        """
+        Desiste de um pedido sem resposta (ex.: timeout). O bloco é destruído,
+        e não devolvido ao pool, pois um worker ainda pode estar lendo o frame.
+        """
+        with self._lock:
+            entry = self._pending.pop(future.request_id, None)
+            if entry is None:
+                return
+            self._destroy_block(entry[1])
+            self.timeouts += 1
+        future.cancel()
+
+    def predict(self, images, **predict_kwargs) -> List[DetectionResult]:
+        futures = []
+        try:
+            for image in images:
+                futures.append(self.submit(image, **predict_kwargs))
+            return [future.result(timeout=self.timeout) for future in futures]
+        finally:
+            for future in futures:
+                if not future.done():
+                    self.abandon(future)
+
+    def _send(self, outbox, requests, responses):
+        """Única thread que envia pedidos por esta conexão; STOP também encerra _receive"""
+        while True:
+            request = outbox.get()
+            try:
+                if request is STOP:
+                    responses.put(STOP)
+                    return
+                if request[1] not in self._pending:
+                    # Abandonado ou falhou antes do envio: o bloco já foi destruído
+                    continue
+                requests.put(request)
+            except (OSError, EOFError) as e:
+                if outbox is self._outbox and self.connected:
+                    self._disconnect(e)
+                return
+
+    def _receive(self, responses):
+        while True:
+            try:
+                response = responses.get()
+            except (OSError, EOFError) as e:
+                if responses is self._responses:
+                    self._disconnect(e)
+                return
+            if response is STOP:
+                return
+            request_id, class_ids, confidences, boxes, names, error = response
+            with self._lock:
+                future, block, started_at = self._pending.pop(request_id, (None, None, None))
+            if future is None:
+                continue
+            self._release_block(block)
+            self._latencies.append(time.monotonic() - started_at)
+            if error:
+                self.errors += 1
+                future.set_exception(RuntimeError(f"Erro no serviço de inferência: {error}"))
+            else:
+                future.set_result(DetectionResult(class_ids, confidences, boxes, names))
+
+    def metrics(self) -> dict:
+        latencies = list(self._latencies)
+        return {
+            'address': self.model_path,
+            'client_id': self.client_id,
+            'connected': self.connected,
+            'requests': self.requests,
+            'errors': self.errors,
+            'timeouts': self.timeouts,
+            'reconnects': self.reconnects,
+            'pending': len(self._pending),
+            'shared_memory_blocks': len(self._blocks),
+            'avg_latency_ms': sum(latencies) / len(latencies) * 1000 if latencies else 0,
+        }
+
+    def close(self):
+        self.closed = True
+        try:
+            if self.connected:
+                self._outbox.put(STOP)
+                self._thread.join(timeout=5)
+                self._manager.close_client(self.client_id)
+        except Exception:
+            pass
+        self.connected = False
+        with self._lock:
+            for block in list(self._blocks):
+                self._destroy_block(block)
+            self._free_blocks = {}
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_inference_client() -> InferenceServiceClient:
+    """Cliente compartilhado do processo, conectado no primeiro uso"""
+    global _client
+    with _client_lock:
+        if _client is not None and _client.closed:
+            _client = None
+        if _client is None:
+            address = parse_address(settings.INFERENCE_SERVICE_ADDRESS)
+            _client = InferenceServiceClient(
+                address,
+                service_authkey(address),
+                timeout=settings.INFERENCE_SERVICE_TIMEOUT,
+                max_blocks=settings.INFERENCE_SERVICE_MAX_BLOCKS
+            )
+            atexit.register(_client.close)
+        return _client
+
+
+def inference_client_metrics():
+    return _client.metrics() if _client is not None else None
@@ -0,0 +1,129 @@
+import glob
+import os
+import shutil
+import time
+
+import cv2
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from camera.object_detector import OnnxBackend, TorchBackend
+
+
+def box_iou(box: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+    """IoU entre uma caixa xyxy e um array (N, 4) de caixas xyxy"""
+    top_left = np.maximum(box[:2], boxes[:, :2])
+    bottom_right = np.minimum(box[2:], boxes[:, 2:])
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=1)
+    area = np.prod(box[2:] - box[:2])
+    areas = np.prod(boxes[:, 2:] - boxes[:, :2], axis=1)
+    return intersection / np.maximum(area + areas - intersection, 1e-9)
+
+
+class Command(BaseCommand):
+    help = 'Exporta o modelo YOLO para ONNX (opcionalmente INT8) e valida o resultado contra o modelo PyTorch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', help='Modelo PyTorch de origem (padrão: YOLO_MODEL_PATH)')
+        parser.add_argument('--output', help='Arquivo .onnx gerado (padrão: ONNX_MODEL_PATH)')
+        parser.add_argument('--imgsz', type=int, default=640, help='Tamanho de entrada do modelo')
+        parser.add_argument('--opset', type=int, help='Versão do opset ONNX')
+        parser.add_argument('--int8', action='store_true',
+                            help='Quantiza os pesos para INT8 (quantização dinâmica do onnxruntime)')
+        parser.add_argument('--images', help='Diretório com imagens para a validação')
+        parser.add_argument('--confidence', type=float, default=0.25, help='Confiança usada na validação')
+        parser.add_argument('--min-match', type=float, default=0.9,
+                            help='Fração mínima de caixas do PyTorch reproduzidas pelo ONNX (IoU >= 0.5)')
+        parser.add_argument('--skip-validation', action='store_true')
+
+    def handle(self, *args, **options):
+        from ultralytics import YOLO
+
+        model_path = options['model'] or settings.YOLO_MODEL_PATH
+        output = options['output'] or settings.ONNX_MODEL_PATH
+        fp32_output = os.path.splitext(output)[0] + '.fp32.onnx' if options['int8'] else output
+
+        self.stdout.write(f"Exportando {model_path} para ONNX (imgsz={options['imgsz']})...")
+        export_kwargs = {'format': 'onnx', 'imgsz': options['imgsz'], 'dynamic': True}
+        if options['opset']:
+            export_kwargs['opset'] = options['opset']
+        exported = YOLO(model_path).export(**export_kwargs)
+
+        os.makedirs(os.path.dirname(os.path.abspath(fp32_output)), exist_ok=True)
+        if os.path.abspath(exported) != os.path.abspath(fp32_output):
+            shutil.move(exported, fp32_output)
+        self.stdout.write(f"Modelo ONNX gravado em {fp32_output}")
+
+        if options['int8']:
+            self.quantize(fp32_output, output)
+            self.stdout.write(f"Modelo INT8 gravado em {output}")
+
+        if not options['skip_validation']:
+            self.validate(model_path, output, options)
+
+    def quantize(self, source: str, output: str):
+        import onnx
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(source, output, weight_type=QuantType.QUInt8)
+
+        # Mantém os metadados (nomes das classes, imgsz) usados pelo OnnxBackend
+        metadata = {prop.key: prop.value for prop in onnx.load(source).metadata_props}
+        quantized = onnx.load(output)
+        metadata.update({prop.key: prop.value for prop in quantized.metadata_props})
+        onnx.helper.set_model_props(quantized, metadata)
+        onnx.save(quantized, output)
+
+    def load_images(self, directory: str = None) -> list:
+        if directory:
+            paths = sorted(
+                path for pattern in ('*.jpg', '*.jpeg', '*.png')
+                for path in glob.glob(os.path.join(directory, pattern))
+            )
+        else:
+            from ultralytics.utils import ASSETS
+            paths = sorted(str(path) for path in ASSETS.glob('*.jpg'))
+
+        images = [image for image in (cv2.imread(path) for path in paths) if image is not None]
+        if not images:
+            raise CommandError('Nenhuma imagem disponível para a validação')
+        return images
+
+    def benchmark(self, backend, images: list, confidence: float):
+        backend.detect(images[:1], conf=confidence)
+        started_at = time.perf_counter()
+        results = [backend.detect([image], conf=confidence)[0] for image in images]
+        return results, (time.perf_counter() - started_at) / len(images) * 1000
+
+    def validate(self, model_path: str, onnx_path: str, options: dict):
+        images = self.load_images(options['images'])
+        confidence = options['confidence']
+        self.stdout.write(f"Validando com {len(images)} imagens...")
+
+        torch_results, torch_ms = self.benchmark(
+            TorchBackend(model_path, 'cpu', 'fp32'), images, confidence
+        )
+        onnx_results, onnx_ms = self.benchmark(
+            OnnxBackend(onnx_path, 'cpu', 'fp32'), images, confidence
+        )
+
+        reference = matched = 0
+        for expected, actual in zip(torch_results, onnx_results):
+            for box, class_id in zip(expected.boxes, expected.class_ids):
+                reference += 1
+                candidates = actual.boxes[actual.class_ids == class_id]
+                if len(candidates) and box_iou(box, candidates).max() >= 0.5:
+                    matched += 1
+
+        match_rate = matched / reference if reference else 1.0
+        self.stdout.write(f"PyTorch: {torch_ms:.1f} ms/imagem | ONNX: {onnx_ms:.1f} ms/imagem "
+                          f"({torch_ms / onnx_ms:.2f}x)")
+        self.stdout.write(f"Caixas reproduzidas: {matched}/{reference} ({match_rate:.1%})")
+
+        if match_rate < options['min_match']:
+            raise CommandError(
+                f"Modelo ONNX divergente: {match_rate:.1%} das caixas reproduzidas "
+                f"(mínimo {options['min_match']:.0%})"
+            )
+        self.stdout.write(self.style.SUCCESS('Modelo ONNX validado'))
@@ -0,0 +1,35 @@
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from camera.supervisor import CameraSupervisor
+
+
+class Command(BaseCommand):
+    help = 'Monitora continuamente as câmeras ativas (captura, inferência e gravação sem espectadores)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--camera', action='append', dest='cameras',
+                            help='camera_id a monitorar (pode ser repetido; padrão: todas as ativas)')
+        parser.add_argument('--sync-interval', type=float, default=settings.CAMERA_MONITOR_SYNC_INTERVAL,
+                            help='Intervalo (s) entre leituras da tabela de câmeras')
+
+    def handle(self, *args, **options):
+        supervisor = CameraSupervisor(
+            sync_interval=options['sync_interval'],
+            camera_ids=options['cameras'],
+            maintenance_interval=settings.DETECTION_MAINTENANCE_INTERVAL_HOURS * 3600
+        )
+        # SIGTERM (systemd, docker stop) encerra como Ctrl+C
+        signal.signal(signal.SIGTERM, self.interrupt)
+        self.stdout.write('Monitoramento das câmeras iniciado (Ctrl+C para encerrar)')
+        try:
+            supervisor.run()
+        except KeyboardInterrupt:
+            self.stdout.write('Encerrando monitoramento...')
+            supervisor.stop()
+
+    @staticmethod
+    def interrupt(signum, frame):
+        raise KeyboardInterrupt
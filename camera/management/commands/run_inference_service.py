@@ -0,0 +1,53 @@
+import signal
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from camera.inference_service import InferenceService, parse_address, service_authkey
+
+
+class Command(BaseCommand):
+    help = 'Inicia o serviço de inferência (processos dedicados, frames por memória compartilhada)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.INFERENCE_SERVICE_WORKERS,
+                            help='Processos de inferência (0 = um por núcleo)')
+        parser.add_argument('--address', default=settings.INFERENCE_SERVICE_ADDRESS,
+                            help='host:porta do servidor de filas')
+        parser.add_argument('--backend', help='torch ou onnx (padrão: INFERENCE_BACKEND)')
+        parser.add_argument('--model', help='Modelo carregado pelos workers')
+        parser.add_argument('--device', help='Dispositivo (padrão: YOLO_DEVICE ou cpu)')
+
+    def handle(self, *args, **options):
+        address = parse_address(options['address'])
+        try:
+            authkey = service_authkey(address)
+        except ImproperlyConfigured as e:
+            raise CommandError(str(e))
+        service = InferenceService(
+            address,
+            authkey,
+            workers=options['workers'],
+            model_path=options['model'],
+            device=options['device'],
+            backend=options['backend']
+        )
+        service.start()
+        self.stdout.write(
+            f"Serviço de inferência em {options['address']} com {len(service.core_groups)} "
+            f"workers ({service.backend}, {service.model_path}): núcleos {service.core_groups}"
+        )
+        # SIGTERM (systemd, docker stop) encerra como Ctrl+C
+        signal.signal(signal.SIGTERM, self.interrupt)
+        try:
+            service.wait()
+            self.stderr.write('Um worker de inferência terminou inesperadamente')
+        except KeyboardInterrupt:
+            self.stdout.write('Encerrando serviço de inferência...')
+        finally:
+            service.stop()
+
+    @staticmethod
+    def interrupt(signum, frame):
+        raise KeyboardInterrupt
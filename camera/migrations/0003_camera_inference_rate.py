@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('camera', '0002_detection'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='camera',
+            name='inference_fps',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='camera',
+            name='inference_stride',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('camera', '0003_camera_inference_rate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='camera',
+            name='inference_backend',
+            field=models.CharField(blank=True, choices=[('torch', 'PyTorch'), ('onnx', 'ONNX Runtime (CPU)')], default='', max_length=10),
+        ),
+    ]
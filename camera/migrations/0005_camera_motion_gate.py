@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('camera', '0004_camera_inference_backend'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='camera',
+            name='motion_roi',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='camera',
+            name='motion_sensitivity',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('camera', '0005_camera_motion_gate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='camera',
+            name='class_whitelist',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='camera',
+            name='inference_roi',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='camera',
+            name='inference_size',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:02
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('camera', '0006_camera_inference_input'),
+        # As caixas são copiadas para monitoring_detection_boxes antes da remoção
+        ('monitoramento', '0006_detection_boxes'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='Detection',
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('camera', '0008_camera_retention_days'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='camera',
+            name='monitored_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
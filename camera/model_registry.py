@@ -0,0 +1,113 @@
+import threading
+from typing import Optional
+
+import numpy as np
+from django.conf import settings
+
+
+def resolve_device(device: Optional[str] = None, backend: str = 'torch') -> str:
+    """Resolve o dispositivo de inferência ('' ou None = automático)"""
+    if device:
+        return device
+    if backend != 'torch':
+        # Backends exportados rodam em CPU e não devem importar o torch
+        return 'cpu'
+    import torch
+    return 'cuda' if torch.cuda.is_available() else 'cpu'
+
+
+class ModelHandle:
+    """
+    Handle compartilhado de um modelo carregado sob demanda.
+    Os backends de inferência não são thread-safe, então as chamadas
+    são serializadas pelo lock do handle.
+    """
+
+    def __init__(self, model_path: str, device: str, precision: str, backend: str = 'torch'):
+        self.model_path = model_path
+        self.device = device
+        self.precision = precision
+        self.backend = backend
+        self.lock = threading.Lock()
+        self._model = None
+        self._load_lock = threading.Lock()
+
+    @property
+    def model(self):
+        """Backend de inferência (camera.object_detector.InferenceBackend)"""
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    # Import tardio: object_detector depende deste módulo
+                    from .object_detector import get_backend_class
+                    backend_class = get_backend_class(self.backend)
+                    self._model = backend_class(self.model_path, self.device, self.precision)
+        return self._model
+
+    @property
+    def names(self):
+        return self.model.names
+
+    def predict(self, images, **kwargs):
+        """
+        Executa a inferência de forma exclusiva no modelo compartilhado
+        Returns:
+            Lista de DetectionResult, um por imagem
+        """
+        model = self.model
+        with self.lock:
+            return model.detect(images, **kwargs)
+
+    def warmup(self, imgsz: int = 640):
+        """Executa uma inferência em imagem vazia para inicializar o modelo"""
+        dummy = np.zeros((imgsz, imgsz, 3), dtype=np.uint8)
+        self.predict([dummy])
+
+
+class ModelRegistry:
+    """
+    Registro de modelos por processo, indexado por (model_path, device, precision, backend).
+    Cada modelo é carregado uma única vez e compartilhado entre os detectores.
+    """
+
+    def __init__(self):
+        self._handles = {}
+        self._lock = threading.Lock()
+
+    def get(self, model_path: str = None, device: str = None, precision: str = None,
+            backend: str = None) -> ModelHandle:
+        backend = backend or settings.INFERENCE_BACKEND
+        if not model_path:
+            model_path = settings.ONNX_MODEL_PATH if backend == 'onnx' else settings.YOLO_MODEL_PATH
+        device = resolve_device(device or settings.YOLO_DEVICE, backend)
+        precision = precision or settings.YOLO_PRECISION
+        key = (model_path, device, precision, backend)
+
+        with self._lock:
+            handle = self._handles.get(key)
+            if handle is None:
+                handle = ModelHandle(model_path, device, precision, backend)
+                self._handles[key] = handle
+            return handle
+
+    def warmup(self, model_path: str = None, device: str = None, precision: str = None,
+               backend: str = None) -> ModelHandle:
+        """Carrega e aquece um modelo antes do primeiro stream"""
+        handle = self.get(model_path, device, precision, backend)
+        handle.warmup()
+        return handle
+
+
+model_registry = ModelRegistry()
+
+
+def warmup_models():
+    """Aquece o modelo padrão na inicialização do servidor, se configurado"""
+    if not settings.YOLO_WARMUP or settings.INFERENCE_SERVICE_MODE == 'remote':
+        return
+    try:
+        handle = model_registry.warmup()
+        print(f"Modelo {handle.model_path} carregado em {handle.device} "
+              f"({handle.backend}, {handle.precision})")
+    except Exception as e:
+        print(f"Erro ao aquecer modelo: {str(e)}")
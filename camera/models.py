@@ -1,10 +1,34 @@
 from django.db import models
 
 class Camera(models.Model):
+    # Status definido pelo operador para excluir a câmera do monitoramento contínuo
+    INACTIVE_STATUS = 'inactive'
+
     camera_id = models.CharField(max_length=50, unique=True)
     camera_link = models.URLField()
     camera_status = models.CharField(max_length=100, default='active')
     camera_loc = models.CharField(max_length=200)
+    # Taxa de inferência: a cada N frames e/ou limite de FPS (vazio = sem limite)
+    inference_stride = models.PositiveIntegerField(default=1)
+    inference_fps = models.FloatField(null=True, blank=True)
+    # Backend de inferência (vazio = INFERENCE_BACKEND)
+    inference_backend = models.CharField(max_length=10, blank=True, default='', choices=[
+        ('torch', 'PyTorch'),
+        ('onnx', 'ONNX Runtime (CPU)'),
+    ])
+    # Filtro de movimento antes da inferência: sensibilidade de 0 a 1 (vazio = desativado)
+    # e polígonos [[x, y], ...] normalizados onde o movimento é observado (vazio = frame inteiro)
+    motion_sensitivity = models.FloatField(null=True, blank=True)
+    motion_roi = models.JSONField(null=True, blank=True)
+    # Entrada do modelo: recorte [x1, y1, x2, y2] normalizado, tamanho de inferência
+    # e classes detectadas (nomes ou ids); vazios = frame inteiro, padrão do modelo, todas
+    inference_roi = models.JSONField(null=True, blank=True)
+    inference_size = models.PositiveIntegerField(null=True, blank=True)
+    class_whitelist = models.JSONField(null=True, blank=True)
+    # Dias de detecções mantidos (vazio = DETECTION_RETENTION_DAYS, 0 = sem limite)
+    retention_days = models.PositiveIntegerField(null=True, blank=True)
+    # Última sincronização de um processo de monitoramento com esta câmera
+    monitored_at = models.DateTimeField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -13,21 +37,3 @@ class Camera(models.Model):
 
     class Meta:
         db_table = 'cameras'
-
-class Detection(models.Model):
-    camera = models.ForeignKey(Camera, on_delete=models.CASCADE, related_name='camera_detections')
-    timestamp = models.DateTimeField()
-    class_name = models.CharField(max_length=100)
-    confidence = models.FloatField()
-    bbox_x = models.FloatField()
-    bbox_y = models.FloatField()
-    bbox_width = models.FloatField()
-    bbox_height = models.FloatField()
-    created_at = models.DateTimeField(auto_now_add=True)
-
-    class Meta:
-        db_table = 'camera_detections'
-        ordering = ['-timestamp']
-
-    def __str__(self):
-        return f"Detection {self.class_name} at {self.timestamp}"
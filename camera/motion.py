@@ -0,0 +1,101 @@
+import time
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """
+    Detector de mudança de cena barato, usado antes da inferência.
+    Compara o frame reduzido em escala de cinza com um fundo de média móvel;
+    a inferência só é liberada quando uma fração suficiente dos pixels da
+    região de interesse mudou ou quando o intervalo de keep-alive expira.
+    """
+
+    def __init__(self, sensitivity: float = 0.5, roi=None, keepalive: float = 30.0,
+                 hold: float = 2.0, width: int = 160, pixel_threshold: int = 25,
+                 learning_rate: float = 0.05):
+        """
+        Args:
+            sensitivity: 0 (só mudanças grandes) a 1 (qualquer mudança)
+            roi: Lista de polígonos [[x, y], ...] em coordenadas normalizadas (0 a 1);
+                None = frame inteiro
+            keepalive: Intervalo máximo (s) sem inferência, mesmo com a cena parada
+            hold: Tempo (s) em que a inferência continua liberada após um movimento
+            width: Largura do frame reduzido usado na comparação
+            pixel_threshold: Diferença de intensidade para um pixel contar como alterado
+            learning_rate: Velocidade com que o fundo absorve mudanças lentas (iluminação)
+        """
+        sensitivity = min(max(sensitivity, 0.0), 1.0)
+        # Fração mínima de pixels alterados: 2,1% (sensibilidade 0) a 0,1% (sensibilidade 1)
+        self.min_changed_fraction = 0.001 + 0.02 * (1 - sensitivity)
+        self.roi = roi
+        self.keepalive = keepalive
+        self.hold = hold
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self.learning_rate = learning_rate
+        self.frames_checked = 0
+        self.frames_passed = 0
+        self._background = None
+        self._mask = None
+        self._mask_pixels = 0
+        self._last_motion_at = None
+        self._last_pass_at = None
+
+    def _build_mask(self, shape):
+        height, width = shape
+        if not self.roi:
+            return None, height * width
+        mask = np.zeros((height, width), dtype=np.uint8)
+        polygons = [
+            np.round(np.array(polygon, dtype=np.float32) * (width - 1, height - 1)).astype(np.int32)
+            for polygon in self.roi
+        ]
+        cv2.fillPoly(mask, polygons, 255)
+        return mask, max(cv2.countNonZero(mask), 1)
+
+    def _prepare(self, frame: np.ndarray) -> np.ndarray:
+        height = max(1, round(frame.shape[0] * self.width / frame.shape[1]))
+        small = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def changed_fraction(self, frame: np.ndarray) -> float:
+        """Atualiza o fundo e retorna a fração de pixels da ROI que mudaram"""
+        gray = self._prepare(frame)
+        if self._background is None or self._background.shape != gray.shape:
+            self._background = gray.astype(np.float32)
+            self._mask, self._mask_pixels = self._build_mask(gray.shape)
+            return 1.0
+
+        difference = cv2.absdiff(gray, cv2.convertScaleAbs(self._background))
+        _, changed = cv2.threshold(difference, self.pixel_threshold, 255, cv2.THRESH_BINARY)
+        if self._mask is not None:
+            changed = cv2.bitwise_and(changed, self._mask)
+        cv2.accumulateWeighted(gray, self._background, self.learning_rate)
+        return cv2.countNonZero(changed) / self._mask_pixels
+
+    def should_infer(self, frame: np.ndarray) -> bool:
+        """Indica se o frame deve passar pelo detector"""
+        now = time.monotonic()
+        self.frames_checked += 1
+        if self.changed_fraction(frame) >= self.min_changed_fraction:
+            self._last_motion_at = now
+
+        passed = (
+            self._last_pass_at is None
+            or (self._last_motion_at is not None and now - self._last_motion_at <= self.hold)
+            or now - self._last_pass_at >= self.keepalive
+        )
+        if passed:
+            self.frames_passed += 1
+            self._last_pass_at = now
+        return passed
+
+    def stats(self) -> dict:
+        return {
+            'frames_checked': self.frames_checked,
+            'frames_passed': self.frames_passed,
+            'pass_rate': self.frames_passed / self.frames_checked if self.frames_checked else 0,
+        }
@@ -1,30 +1,408 @@
-from ultralytics import YOLO
-from typing import Union, Tuple, List, Dict
+import ast
+from typing import Union, Tuple, List, Dict, Optional
+import cv2
 import numpy as np
-import torch
+from django.conf import settings
+from .inference_scheduler import get_scheduler
+from .model_registry import model_registry
+from .overlay import overlay_renderer
 
-class ObjectDetector:
-    def __init__(self, model_path: str = "yolo11s.pt", confidence: float = 0.45):
+
+class DetectionResult:
+    """
+    Detecções em formato colunar (arrays NumPy + tabela de nomes das classes).
+    A lista de dicts usada no JSON só é montada quando alguém a solicita.
+    """
+
+    def __init__(self, class_ids: np.ndarray, confidences: np.ndarray,
+                 boxes: np.ndarray, names: Dict[int, str]):
+        self.class_ids = class_ids
+        self.confidences = confidences
+        self.boxes = boxes
+        self.names = names
+        self._dicts = None
+
+    @classmethod
+    def from_ultralytics(cls, result) -> 'DetectionResult':
+        # Uma única transferência do tensor (N, 6): x1, y1, x2, y2, [track_id,] conf, cls
+        data = result.boxes.data.cpu().numpy()
+        return cls(
+            class_ids=data[:, -1].astype(np.int32),
+            confidences=data[:, -2].astype(np.float32),
+            boxes=data[:, :4].astype(np.float32),
+            names=result.names
+        )
+
+    @classmethod
+    def empty(cls, names: Dict[int, str] = None) -> 'DetectionResult':
+        return cls(
+            class_ids=np.empty(0, dtype=np.int32),
+            confidences=np.empty(0, dtype=np.float32),
+            boxes=np.empty((0, 4), dtype=np.float32),
+            names=names or {}
+        )
+
+    def __len__(self):
+        return len(self.class_ids)
+
+    def __bool__(self):
+        return len(self.class_ids) > 0
+
+    def __iter__(self):
+        return iter(self.to_list())
+
+    def __getitem__(self, index):
+        return self.to_list()[index]
+
+    @property
+    def class_names(self) -> List[str]:
+        return [self.names[class_id] for class_id in self.class_ids.tolist()]
+
+    def labels(self) -> List[str]:
+        """Rótulos 'classe (confiança%)' de cada detecção, sem montar os dicts"""
+        return [
+            f"{class_name} ({confidence:.2%})"
+            for class_name, confidence in zip(self.class_names, self.confidences.tolist())
+        ]
+
+    def to_list(self) -> List[Dict]:
+        """Lista de dicts (class_id, class_name, confidence, bbox) para JSON"""
+        if self._dicts is None:
+            self._dicts = [
+                {
+                    'class_id': class_id,
+                    'class_name': self.names[class_id],
+                    'confidence': confidence,
+                    'bbox': bbox
+                }
+                for class_id, confidence, bbox in zip(
+                    self.class_ids.tolist(), self.confidences.tolist(), self.boxes.tolist()
+                )
+            ]
+        return self._dicts
+
+
+class InferenceBackend:
+    """
+    Interface dos backends de inferência. Cada backend carrega o modelo no
+    construtor e converte a saída nativa em DetectionResult.
+    """
+
+    name = None
+
+    def __init__(self, model_path: str, device: str, precision: str):
+        self.model_path = model_path
+        self.device = device
+        self.precision = precision
+
+    @property
+    def names(self) -> Dict[int, str]:
+        raise NotImplementedError
+
+    def class_ids(self, classes) -> Optional[List[int]]:
+        """
+        Converte uma lista de classes (nomes e/ou ids) em ids do modelo
+        Returns:
+            None para todas as classes; nomes desconhecidos são ignorados
+        """
+        if not classes:
+            return None
+        ids_by_name = {name: class_id for class_id, name in self.names.items()}
+        return [
+            ids_by_name[value] if isinstance(value, str) else int(value)
+            for value in classes
+            if not isinstance(value, str) or value in ids_by_name
+        ]
+
+    def detect(self, images: List[np.ndarray], conf: float = 0.25, imgsz: int = None,
+               classes=None) -> List[DetectionResult]:
+        """
+        Executa a detecção em um lote de frames BGR
+        Args:
+            imgsz: Tamanho de entrada do modelo (None = tamanho padrão do modelo)
+            classes: Classes consideradas, por nome ou id (None = todas)
+        Returns:
+            Lista de DetectionResult, na mesma ordem das imagens
+        """
+        raise NotImplementedError
+
+
+class TorchBackend(InferenceBackend):
+    """Modelo .pt do ultralytics executado com PyTorch (CPU ou GPU)"""
+
+    name = 'torch'
+
+    def __init__(self, model_path: str, device: str, precision: str):
+        super().__init__(model_path, device, precision)
+        # Import tardio: processos com backend ONNX não carregam o torch
+        from ultralytics import YOLO
         self.model = YOLO(model_path)
+        self.model.to(device)
+
+    @property
+    def names(self) -> Dict[int, str]:
+        return self.model.names
+
+    @property
+    def half(self) -> bool:
+        # fp16 só é suportado em GPU
+        return self.precision == 'fp16' and self.device != 'cpu'
+
+    def detect(self, images: List[np.ndarray], conf: float = 0.25, imgsz: int = None,
+               classes=None) -> List[DetectionResult]:
+        kwargs = {'half': True} if self.half else {}
+        if imgsz:
+            kwargs['imgsz'] = imgsz
+        class_ids = self.class_ids(classes)
+        if class_ids is not None:
+            if not class_ids:
+                return [DetectionResult.empty(self.names) for _ in images]
+            kwargs['classes'] = class_ids
+        results = self.model(images, conf=conf, verbose=False, **kwargs)
+        return [DetectionResult.from_ultralytics(result) for result in results]
+
+
+class OnnxBackend(InferenceBackend):
+    """
+    Modelo exportado para ONNX (ver o comando export_model) executado com
+    ONNX Runtime em CPU. Pré-processamento (letterbox) e NMS são feitos
+    com OpenCV/NumPy, sem depender do torch.
+    """
+
+    name = 'onnx'
+
+    def __init__(self, model_path: str, device: str, precision: str,
+                 iou: float = 0.7, max_det: int = 300, threads: int = None):
+        super().__init__(model_path, device, precision)
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        threads = threads or settings.ONNX_THREADS
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self.iou = iou
+        self.max_det = max_det
+
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        # Modelos exportados sem dynamic=True aceitam apenas lote 1 e entrada quadrada
+        self.dynamic_batch = not isinstance(model_input.shape[0], int)
+        self.dynamic_shape = not isinstance(model_input.shape[2], int)
+
+        # Metadados gravados pelo ultralytics na exportação
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.input_height, self.input_width = ast.literal_eval(metadata.get('imgsz', '[640, 640]'))
+        self.stride = int(metadata.get('stride', 32))
+        if 'names' in metadata:
+            self._names = {int(k): v for k, v in ast.literal_eval(metadata['names']).items()}
+        else:
+            num_classes = self.session.get_outputs()[0].shape[1] - 4
+            self._names = {i: str(i) for i in range(num_classes)}
+
+    @property
+    def names(self) -> Dict[int, str]:
+        return self._names
+
+    @staticmethod
+    def _resized_shape(shape, target: Tuple[int, int]) -> Tuple[int, int]:
+        scale = min(target[0] / shape[0], target[1] / shape[1])
+        return round(shape[0] * scale), round(shape[1] * scale)
+
+    def _input_shape(self, images: List[np.ndarray], target: Tuple[int, int]) -> Tuple[int, int]:
+        """Tamanho de entrada do lote: quadrado fixo ou, em modelos dinâmicos, o
+        menor múltiplo do stride que comporta todas as imagens redimensionadas"""
+        if not self.dynamic_shape:
+            return self.input_height, self.input_width
+        shapes = [self._resized_shape(image.shape, target) for image in images]
+        height = max(h for h, _ in shapes)
+        width = max(w for _, w in shapes)
+        return (-(-height // self.stride) * self.stride,
+                -(-width // self.stride) * self.stride)
+
+    def _letterbox(self, image: np.ndarray, input_shape: Tuple[int, int], target: Tuple[int, int]):
+        """Redimensiona mantendo a proporção dentro de target e completa com bordas até input_shape"""
+        height, width = image.shape[:2]
+        new_height, new_width = self._resized_shape(image.shape, target)
+        scale = min(target[0] / height, target[1] / width)
+        if (new_height, new_width) != (height, width):
+            image = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+
+        input_height, input_width = input_shape
+        left = (input_width - new_width) // 2
+        top = (input_height - new_height) // 2
+        image = cv2.copyMakeBorder(
+            image, top, input_height - new_height - top,
+            left, input_width - new_width - left,
+            cv2.BORDER_CONSTANT, value=(114, 114, 114)
+        )
+        return image, scale, left, top
+
+    def _postprocess(self, output: np.ndarray, conf: float, scale: float,
+                     left: int, top: int, shape, class_ids: List[int] = None) -> DetectionResult:
+        # Saída (4 + classes, N): cx, cy, w, h seguidos dos scores por classe
+        predictions = output.T
+        scores = predictions[:, 4:]
+        allowed = class_ids
+        class_ids = scores.argmax(axis=1)
+        confidences = scores[np.arange(len(scores)), class_ids]
+
+        keep = confidences > conf
+        if allowed is not None:
+            # Caixas cuja melhor classe não está na lista não entram no NMS
+            keep &= np.isin(class_ids, allowed)
+        if not keep.any():
+            return DetectionResult.empty(self._names)
+        xywh = predictions[keep, :4]
+        confidences = confidences[keep]
+        class_ids = class_ids[keep]
+
+        xywh[:, :2] -= xywh[:, 2:] / 2
+        indices = cv2.dnn.NMSBoxesBatched(xywh, confidences, class_ids, conf, self.iou)
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1)[:self.max_det]
+
+        boxes = xywh[indices]
+        boxes[:, 2:] += boxes[:, :2]
+        boxes -= (left, top, left, top)
+        boxes /= scale
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, shape[1])
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, shape[0])
+
+        return DetectionResult(
+            class_ids=class_ids[indices].astype(np.int32),
+            confidences=confidences[indices].astype(np.float32),
+            boxes=boxes.astype(np.float32),
+            names=self._names
+        )
+
+    def detect(self, images: List[np.ndarray], conf: float = 0.25, imgsz: int = None,
+               classes=None) -> List[DetectionResult]:
+        class_ids = self.class_ids(classes)
+        if class_ids is not None and not class_ids:
+            return [DetectionResult.empty(self._names) for _ in images]
+
+        # imgsz só se aplica a modelos exportados com entrada dinâmica
+        target = (imgsz, imgsz) if imgsz and self.dynamic_shape else (self.input_height, self.input_width)
+        input_shape = self._input_shape(images, target)
+        letterboxed = [self._letterbox(image, input_shape, target) for image in images]
+        blob = cv2.dnn.blobFromImages(
+            [padded for padded, _, _, _ in letterboxed], 1 / 255.0, swapRB=True
+        )
+        if self.dynamic_batch:
+            outputs = self.session.run(None, {self.input_name: blob})[0]
+        else:
+            outputs = np.concatenate([
+                self.session.run(None, {self.input_name: blob[i:i + 1]})[0]
+                for i in range(len(images))
+            ])
+
+        return [
+            self._postprocess(output, conf, scale, left, top, image.shape, class_ids)
+            for output, image, (_, scale, left, top) in zip(outputs, images, letterboxed)
+        ]
+
+
+BACKENDS = {
+    TorchBackend.name: TorchBackend,
+    OnnxBackend.name: OnnxBackend,
+}
+
+
+def get_backend_class(name: str):
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Invalid inference backend: {name}. Use one of {', '.join(BACKENDS)}")
+
+
+class ObjectDetector:
+    def __init__(self, model_path: str = None, confidence: float = 0.45,
+                 device: str = None, precision: str = None, batching: bool = None,
+                 backend: str = None, roi: List[float] = None, imgsz: int = None,
+                 classes: List[Union[str, int]] = None):
+        """
+        Args:
+            roi: Retângulo [x1, y1, x2, y2] normalizado (0 a 1) enviado ao modelo (None = frame inteiro)
+            imgsz: Tamanho de entrada do modelo (None = padrão do modelo)
+            classes: Classes detectadas, por nome ou id (None = todas)
+        """
         self.confidence = confidence
-        self.model.to('cuda' if torch.cuda.is_available() else 'cpu')
-
-    def process_image(self, image: Union[str, np.ndarray]) -> Tuple[np.ndarray, List[Dict]]:
-        results = self.model(image, conf=self.confidence)
-        
-        # Create list of detections with class names
-        detections = []
-        for box in results[0].boxes:
-            class_id = int(box.cls[0])
-            class_name = results[0].names[class_id]
-            confidence = float(box.conf[0])
-            bbox = box.xyxy[0].tolist()
-            
-            detections.append({
-                'class_id': class_id,
-                'class_name': class_name,
-                'confidence': confidence,
-                'bbox': bbox
-            })
-            
-        return results[0].plot(), detections
\ No newline at end of file
+        self.roi = roi
+        # Parâmetros extras da inferência; tuplas para agrupar pedidos no lote
+        self.predict_kwargs = {}
+        if imgsz:
+            self.predict_kwargs['imgsz'] = imgsz
+        if classes:
+            self.predict_kwargs['classes'] = tuple(classes)
+        self.batching = settings.INFERENCE_BATCHING if batching is None else batching
+        self.model = self._remote_model() if settings.INFERENCE_SERVICE_MODE != 'local' else None
+        if self.model is not None:
+            # O serviço de inferência usa o modelo com que foi iniciado
+            self.batching = False
+        else:
+            # Modelo compartilhado pelo registro do processo (carregado uma única vez)
+            self.model = model_registry.get(model_path, device, precision, backend)
+
+    @staticmethod
+    def _remote_model():
+        """Cliente do serviço de inferência (modo remote ou auto) ou None para inferência local"""
+        from .inference_service import get_inference_client
+        try:
+            return get_inference_client()
+        except (OSError, EOFError) as e:
+            if settings.INFERENCE_SERVICE_MODE == 'remote':
+                raise
+            print(f"Serviço de inferência indisponível ({str(e)}), usando inferência local")
+            return None
+
+    def process_image(self, image: Union[str, np.ndarray],
+                      render: bool = False) -> Tuple[Optional[np.ndarray], DetectionResult]:
+        """
+        Executa a detecção em uma imagem
+        Args:
+            image: Caminho do arquivo ou frame BGR (nunca modificado)
+            render: Desenha as detecções sobre uma cópia do frame; por padrão
+                nada é desenhado nem copiado
+        Returns:
+            Tupla (frame anotado ou None, detecções)
+        """
+        # Só um frame recebido do chamador precisa ser copiado antes de desenhar
+        owned = isinstance(image, str)
+        if owned:
+            path = image
+            image = cv2.imread(path)
+            if image is None:
+                raise ValueError(f"Não foi possível ler a imagem: {path}")
+
+        # Apenas a região de interesse vai ao modelo (view, sem cópia)
+        left, top, region = self._crop(image)
+
+        if self.batching:
+            # Frame entra no micro-lote compartilhado entre as câmeras
+            detections = get_scheduler(self.model).submit(
+                region, conf=self.confidence, **self.predict_kwargs
+            ).result()
+        else:
+            detections = self.model.predict([region], conf=self.confidence, **self.predict_kwargs)[0]
+
+        if left or top:
+            # Caixas de volta às coordenadas do frame completo
+            detections.boxes = detections.boxes + np.array([left, top, left, top], dtype=np.float32)
+
+        if not render:
+            return None, detections
+        return overlay_renderer.draw(image if owned else image.copy(), detections), detections
+
+    def _crop(self, image: np.ndarray):
+        """
+        Returns:
+            Tupla (x, y, região) com o deslocamento da região de interesse no frame
+        """
+        if not self.roi:
+            return 0, 0, image
+        height, width = image.shape[:2]
+        x1, y1, x2, y2 = self.roi
+        left, top = int(x1 * width), int(y1 * height)
+        right, bottom = max(int(round(x2 * width)), left + 1), max(int(round(y2 * height)), top + 1)
+        return left, top, image[top:bottom, left:right]
@@ -0,0 +1,103 @@
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+# Cores BGR atribuídas por class_id
+PALETTE = (
+    (56, 56, 255), (151, 157, 255), (31, 112, 255), (29, 178, 255), (49, 210, 207),
+    (10, 249, 72), (23, 204, 146), (134, 219, 61), (52, 147, 26), (187, 212, 0),
+    (168, 153, 44), (255, 194, 0), (147, 69, 52), (255, 115, 100), (236, 24, 0),
+    (255, 56, 132), (133, 0, 82), (255, 56, 203), (200, 149, 255), (199, 55, 255),
+)
+
+
+class BoxOverlayRenderer:
+    """
+    Desenha caixas e rótulos diretamente sobre o buffer do frame, sem cópia.
+    O nome de cada classe e cada caractere da confiança são rasterizados uma
+    única vez por cor com cv2.putText e colados lado a lado nos frames
+    seguintes, então a confiança, que muda a cada frame, não gera novas imagens.
+    """
+
+    def __init__(self, thickness: int = 2, font_scale: float = 0.5, max_cached_labels: int = 512):
+        """
+        Args:
+            thickness: Espessura das caixas em pixels
+            font_scale: Escala da fonte dos rótulos
+            max_cached_labels: Quantidade de nomes e caracteres rasterizados mantidos em cache
+        """
+        self.thickness = thickness
+        self.font_scale = font_scale
+        self.max_cached_labels = max_cached_labels
+        # Altura comum a todos os rótulos, para que nome e dígitos se alinhem
+        (_, self._text_height), baseline = cv2.getTextSize('Ag', cv2.FONT_HERSHEY_SIMPLEX, font_scale, 1)
+        self.label_height = self._text_height + baseline + 4
+        self._glyphs = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def color(class_id: int) -> tuple:
+        return PALETTE[class_id % len(PALETTE)]
+
+    def _glyph(self, text: str, color: tuple, padding: int = 0) -> np.ndarray:
+        """Texto branco sobre a cor da classe, com altura label_height"""
+        key = (text, color, padding)
+        with self._lock:
+            glyph = self._glyphs.get(key)
+            if glyph is not None:
+                self._glyphs.move_to_end(key)
+                return glyph
+
+        (width, _), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, self.font_scale, 1)
+        glyph = np.empty((self.label_height, width + 2 * padding, 3), dtype=np.uint8)
+        glyph[:] = color
+        cv2.putText(glyph, text, (padding, self._text_height + 2), cv2.FONT_HERSHEY_SIMPLEX,
+                    self.font_scale, (255, 255, 255), 1, cv2.LINE_AA)
+
+        with self._lock:
+            self._glyphs[key] = glyph
+            if len(self._glyphs) > self.max_cached_labels:
+                self._glyphs.popitem(last=False)
+        return glyph
+
+    def _paste(self, image: np.ndarray, glyph: np.ndarray, x: int, y: int):
+        """Cola o rótulo com o canto superior esquerdo em (x, y), recortando nas bordas"""
+        frame_height, frame_width = image.shape[:2]
+        glyph_height, glyph_width = glyph.shape[:2]
+        x = min(max(x, 0), max(frame_width - 1, 0))
+        y = min(max(y, 0), max(frame_height - 1, 0))
+        width = min(glyph_width, frame_width - x)
+        height = min(glyph_height, frame_height - y)
+        image[y:y + height, x:x + width] = glyph[:height, :width]
+
+    def draw(self, image: np.ndarray, detections) -> np.ndarray:
+        """
+        Desenha as detecções sobre o próprio frame
+        Args:
+            image: Frame BGR, modificado no lugar
+            detections: DetectionResult
+        Returns:
+            O mesmo array recebido em image
+        """
+        for (x1, y1, x2, y2), class_id, confidence in zip(
+                detections.boxes.astype(int).tolist(), detections.class_ids.tolist(),
+                detections.confidences.tolist()):
+            color = self.color(class_id)
+            cv2.rectangle(image, (x1, y1), (x2, y2), color, self.thickness)
+
+            # Rótulo "nome 0.87" acima da caixa; dentro dela quando não há espaço no topo
+            label_y = y1 - self.label_height if y1 >= self.label_height else y1
+            x = max(x1, 0)
+            glyphs = [self._glyph(detections.names[class_id], color, padding=2)]
+            glyphs += [self._glyph(char, color) for char in f" {confidence:.2f} "]
+            for glyph in glyphs:
+                if x >= image.shape[1]:
+                    break
+                self._paste(image, glyph, x, label_y)
+                x += glyph.shape[1]
+        return image
+
+
+overlay_renderer = BoxOverlayRenderer()
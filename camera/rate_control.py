@@ -0,0 +1,53 @@
+import math
+import time
+
+
+class InferenceRateController:
+    """
+    Decide em quais frames a inferência é executada.
+    A taxa base é configurada por câmera (a cada N frames e/ou FPS alvo) e
+    recua automaticamente quando a latência da inferência supera o intervalo
+    entre frames, para que o stream nunca fique atrás do tempo real.
+    """
+
+    def __init__(self, frame_stride: int = 1, target_fps: float = None,
+                 source_fps: float = None, smoothing: float = 0.2):
+        """
+        Args:
+            frame_stride: Executa a inferência a cada N frames
+            target_fps: Limite de inferências por segundo (opcional)
+            source_fps: FPS do stream; usado para calcular o recuo automático
+            smoothing: Peso da média móvel exponencial da latência
+        """
+        self.frame_stride = max(1, frame_stride or 1)
+        self.min_interval = 1 / target_fps if target_fps else 0
+        self.frame_interval = 1 / source_fps if source_fps and source_fps > 0 else 1 / 25
+        self.smoothing = smoothing
+        self.latency = 0.0
+        self._frames_since_inference = 0
+        self._last_inference_at = None
+
+    @property
+    def stride(self) -> int:
+        """Intervalo efetivo em frames, incluindo o recuo por latência"""
+        if self.latency <= self.frame_interval:
+            return self.frame_stride
+        return max(self.frame_stride, math.ceil(self.latency / self.frame_interval) + 1)
+
+    def should_infer(self) -> bool:
+        """Registra um frame lido e indica se ele deve passar pelo detector"""
+        self._frames_since_inference += 1
+        if self._last_inference_at is None:
+            return True
+        if self._frames_since_inference < self.stride:
+            return False
+        return time.monotonic() - self._last_inference_at >= self.min_interval
+
+    def record_inference(self, latency: float):
+        """Registra a duração de uma inferência (em segundos)"""
+        if self._last_inference_at is None:
+            self.latency = latency
+        else:
+            self.latency += self.smoothing * (latency - self.latency)
+        self._last_inference_at = time.monotonic()
+        self._frames_since_inference = 0
@@ -4,5 +4,50 @@ from .models import Camera
 class CameraSerializer(serializers.ModelSerializer):
     class Meta:
         model = Camera
-        fields = ['camera_id', 'camera_link', 'camera_status', 'camera_loc']
-        lookup_field = 'camera_id'
\ No newline at end of file
+        fields = ['camera_id', 'camera_link', 'camera_status', 'camera_loc',
+                  'inference_stride', 'inference_fps', 'inference_backend',
+                  'motion_sensitivity', 'motion_roi', 'inference_roi', 'inference_size',
+                  'class_whitelist', 'retention_days']
+        lookup_field = 'camera_id'
+
+    def validate_motion_sensitivity(self, value):
+        if value is not None and not 0 <= value <= 1:
+            raise serializers.ValidationError('Use a value between 0 and 1')
+        return value
+
+    def validate_motion_roi(self, value):
+        if not value:
+            return None
+        error = 'Use a list of polygons, each a list of at least 3 [x, y] points between 0 and 1'
+        if not isinstance(value, list):
+            raise serializers.ValidationError(error)
+        for polygon in value:
+            if not isinstance(polygon, list) or len(polygon) < 3:
+                raise serializers.ValidationError(error)
+            for point in polygon:
+                if (not isinstance(point, list) or len(point) != 2 or
+                        not all(isinstance(c, (int, float)) and 0 <= c <= 1 for c in point)):
+                    raise serializers.ValidationError(error)
+        return value
+
+    def validate_inference_roi(self, value):
+        if not value:
+            return None
+        if (not isinstance(value, list) or len(value) != 4 or
+                not all(isinstance(c, (int, float)) and 0 <= c <= 1 for c in value) or
+                value[0] >= value[2] or value[1] >= value[3]):
+            raise serializers.ValidationError('Use [x1, y1, x2, y2] between 0 and 1, with x1 < x2 and y1 < y2')
+        return value
+
+    def validate_inference_size(self, value):
+        if value is not None and (value < 32 or value % 32):
+            raise serializers.ValidationError('Use a multiple of 32')
+        return value
+
+    def validate_class_whitelist(self, value):
+        if not value:
+            return None
+        if not isinstance(value, list) or not all(
+                isinstance(c, str) or (isinstance(c, int) and c >= 0) for c in value):
+            raise serializers.ValidationError('Use a list of class names or ids')
+        return value
@@ -1,82 +1,128 @@
 from datetime import datetime, timedelta
 import cv2
-import os
+import time
+from django.conf import settings
 from .models import Camera
+from monitoramento.detection_writer import get_detection_writer
 from monitoramento.models import Detection
-from .object_detector import ObjectDetector
+from monitoramento.snapshots import get_snapshot_store
+from .capture import LatestFrameReader, redact_url
+from .motion import MotionGate
+from .object_detector import DetectionResult, ObjectDetector
+from .overlay import overlay_renderer
+from .rate_control import InferenceRateController
 
 class CameraService:
     def __init__(self, camera_id: str):
         try:
             self.camera = Camera.objects.get(camera_id=camera_id)
-            self.detector = ObjectDetector()
+            self.detector = ObjectDetector(
+                backend=self.camera.inference_backend or None,
+                roi=self.camera.inference_roi,
+                imgsz=self.camera.inference_size,
+                classes=self.camera.class_whitelist
+            )
             self.last_detection_time = None
             self.detection_interval = timedelta(seconds=15)
         except Camera.DoesNotExist:
             raise ValueError(f"Camera {camera_id} not found")
 
-    def generate_frames(self):
-        """Gera frames do stream da câmera com as detecções em tempo real"""
-        if not os.path.exists('frames'):
-            os.makedirs('frames')
-            
-        cap = cv2.VideoCapture(self.camera.camera_link)
+    def generate_frames(self, stop_event=None, render=True, persist=True):
+        """
+        Gera frames anotados do stream da câmera com as detecções em tempo real
+        Args:
+            stop_event: threading.Event opcional que encerra a captura quando sinalizado
+            render: Quando False (modo de análise sem espectadores), os frames
+                são entregues sem caixas nem textos desenhados. Aceita também uma
+                função sem argumentos, avaliada a cada frame
+            persist: Quando False as detecções não são gravadas (câmera já gravada
+                por outro processo). Aceita também uma função, como render
+        """
+        cap = LatestFrameReader(self.camera.camera_link, name=self.camera.camera_id)
+        self.capture = cap
         
         if not cap.isOpened():
+            cap.release()
             self.camera.camera_status = 'error: cannot connect'
             self.camera.save()
-            raise Exception(f"Não foi possível conectar à câmera: {self.camera.camera_link}")
-            
-        while True:
-            success, frame = cap.read()
-            if not success:
-                break
-                
-            annotated_frame, detections = self.detector.process_image(frame)
-            current_time = datetime.now()
-            detected_objects = []
+            raise Exception(f"Não foi possível conectar à câmera: {redact_url(self.camera.camera_link)}")
             
-            if detections:
-                for detection in detections:
-                    class_name = detection['class_name']
-                    confidence = detection['confidence']
-                    detected_objects.append(f"{class_name} ({confidence:.2%})")
-                
-                if not self.last_detection_time or \
-                   (current_time - self.last_detection_time) > self.detection_interval:
-                    try:
-                        # Save detection to database
-                        Detection.objects.create(
-                            camera=self.camera,
-                            detection_date=current_time.date(),
-                            detection_time=current_time.time(),
-                            detections=detections
-                        )
-                        
-                        # Save frame
-                        frame_path = f"frames/detection_{current_time.strftime('%Y%m%d_%H%M%S')}.jpg"
-                        cv2.imwrite(frame_path, annotated_frame)
-                        print(f"Saved detection at {current_time}: {', '.join(detected_objects)}")
-                        
-                        self.last_detection_time = current_time
-                        
-                    except Exception as e:
-                        print(f"Erro ao salvar detecção: {str(e)}")
+        rate = InferenceRateController(
+            frame_stride=self.camera.inference_stride,
+            target_fps=self.camera.inference_fps,
+            source_fps=cap.get(cv2.CAP_PROP_FPS)
+        )
+        motion = None
+        if self.camera.motion_sensitivity is not None:
+            motion = MotionGate(
+                sensitivity=self.camera.motion_sensitivity,
+                roi=self.camera.motion_roi,
+                keepalive=settings.MOTION_KEEPALIVE_SECONDS
+            )
+        detections = DetectionResult.empty()
+
+        try:
+            while stop_event is None or not stop_event.is_set():
+                success, frame = cap.read()
+                if not success:
+                    break
+
+                render_frame = render() if callable(render) else render
+                # Cena parada não passa pelo detector (exceto no keep-alive)
+                if rate.should_infer() and (motion is None or motion.should_infer(frame)):
+                    started_at = time.monotonic()
+                    annotated_frame, detections = self.detector.process_image(frame, render=render_frame)
+                    rate.record_inference(time.monotonic() - started_at)
+                    if persist() if callable(persist) else persist:
+                        self._record_detections(detections, annotated_frame if render_frame else frame)
+                elif render_frame:
+                    # Frames intermediários reutilizam as últimas caixas detectadas
+                    annotated_frame = overlay_renderer.draw(frame, detections)
 
-            # Add overlay text
-            if self.last_detection_time:
-                timestamp_text = f"Ultima deteccao: {self.last_detection_time.strftime('%d/%m/%y %H:%M')}"
-                location_text = f"Local: {self.camera.camera_loc}"
+                if not render_frame:
+                    yield frame
+                    continue
+
+                # Add overlay text
+                if self.last_detection_time:
+                    timestamp_text = f"Ultima deteccao: {self.last_detection_time.strftime('%d/%m/%y %H:%M')}"
+                    location_text = f"Local: {self.camera.camera_loc}"
                 
-                cv2.putText(annotated_frame, timestamp_text, (10, 30),
-                           cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2, cv2.LINE_AA)
-                cv2.putText(annotated_frame, location_text, (10, 70),
-                           cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2, cv2.LINE_AA)
+                    cv2.putText(annotated_frame, timestamp_text, (10, 30),
+                               cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2, cv2.LINE_AA)
+                    cv2.putText(annotated_frame, location_text, (10, 70),
+                               cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2, cv2.LINE_AA)
 
-            ret, buffer = cv2.imencode('.jpg', annotated_frame)
-            frame_bytes = buffer.tobytes()
-            
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+                yield annotated_frame
+        finally:
+            cap.release()
+
+    def _record_detections(self, detections, annotated_frame):
+        """Persiste as detecções respeitando o intervalo mínimo entre registros"""
+        current_time = datetime.now()
+
+        if detections:
+            if not self.last_detection_time or \
+               (current_time - self.last_detection_time) > self.detection_interval:
+                try:
+                    # Frame é codificado e gravado fora do loop de frames
+                    snapshot_path = get_snapshot_store().save(
+                        self.camera.camera_id, annotated_frame, current_time
+                    )
+
+                    # Enfileira para gravação em lote, sem bloquear o loop de frames
+                    detection = Detection(
+                        camera=self.camera,
+                        detection_date=current_time.date(),
+                        detection_time=current_time.time(),
+                        snapshot_path=snapshot_path or ''
+                    )
+                    detection.set_boxes(detections.to_list())
+                    get_detection_writer().submit(detection)
+
+                    print(f"Saved detection at {current_time}: {', '.join(detections.labels())}")
+
+                    self.last_detection_time = current_time
 
-        cap.release()
\ No newline at end of file
+                except Exception as e:
+                    print(f"Erro ao salvar detecção: {str(e)}")
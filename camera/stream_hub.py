@@ -0,0 +1,402 @@
+import asyncio
+import queue
+import threading
+import time
+from datetime import timedelta
+
+import cv2
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+
+class StreamUnavailable(Exception):
+    """A câmera não entregou o primeiro frame (falha de conexão ou timeout)"""
+
+
+class FrameSubscription:
+    """
+    Fila limitada de um espectador. Quando o cliente não acompanha o ritmo
+    da câmera, os frames mais antigos são descartados em vez de bloquear o pipeline.
+    """
+
+    def __init__(self, maxsize: int):
+        self.frames_dropped = 0
+        self._queue = queue.Queue(maxsize=maxsize)
+
+    def put(self, chunk):
+        """Entrega um frame sem nunca bloquear (chamado pela thread do pipeline)"""
+        while True:
+            try:
+                self._queue.put_nowait(chunk)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.frames_dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout: float = 5.0):
+        """
+        Aguarda o próximo frame
+        Raises:
+            queue.Empty: se nenhum frame chegou dentro do timeout
+        """
+        return self._queue.get(timeout=timeout)
+
+
+class AsyncFrameSubscription(FrameSubscription):
+    """
+    Fila de um espectador servido por um event loop (ASGI). A thread do
+    pipeline acorda o loop a cada frame, sem ocupar uma thread por espectador.
+    """
+
+    def __init__(self, maxsize: int, loop: asyncio.AbstractEventLoop):
+        super().__init__(maxsize)
+        self._loop = loop
+        self._event = asyncio.Event()
+
+    def put(self, chunk):
+        super().put(chunk)
+        try:
+            self._loop.call_soon_threadsafe(self._event.set)
+        except RuntimeError:
+            # Event loop já encerrado
+            pass
+
+    async def aget(self, timeout: float = 5.0):
+        """
+        Aguarda o próximo frame sem bloquear o event loop
+        Raises:
+            asyncio.TimeoutError: se nenhum frame chegou dentro do timeout
+        """
+        while True:
+            try:
+                return self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            self._event.clear()
+            # Verifica novamente após limpar o evento para não perder um aviso
+            try:
+                return self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            await asyncio.wait_for(self._event.wait(), timeout)
+
+
+class CameraPipeline:
+    """
+    Pipeline único de captura e inferência de uma câmera, compartilhado
+    por todos os espectadores conectados a ela. Pipelines mantidos pelo
+    monitoramento (keep_alive) continuam sem espectadores e reconectam
+    com backoff exponencial quando o stream cai. Pipelines abertos por
+    espectadores não gravam detecções de câmeras já monitoradas por outro
+    processo (monitor_cameras), evitando registros e rollups duplicados.
+    """
+
+    # Sinaliza aos espectadores que o pipeline terminou
+    END_OF_STREAM = None
+    # Intervalo (s) entre consultas a Camera.monitored_at
+    MONITOR_CHECK_INTERVAL = 5.0
+
+    def __init__(self, camera_id: str, keep_alive: bool = False):
+        self.camera_id = camera_id
+        self.keep_alive = keep_alive
+        self.running = False
+        # Última falha de conexão; limpa quando a câmera volta a entregar frames
+        self.error = None
+        self._subscriptions = []
+        self._subscriptions_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._persist = True
+        self._persist_checked_at = None
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscriptions)
+
+    def add_subscription(self, subscription: FrameSubscription):
+        with self._subscriptions_lock:
+            self._subscriptions.append(subscription)
+
+    def remove_subscription(self, subscription: FrameSubscription):
+        with self._subscriptions_lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+
+    def has_subscription(self, subscription: FrameSubscription) -> bool:
+        with self._subscriptions_lock:
+            return subscription in self._subscriptions
+
+    def take_subscriptions(self) -> list:
+        """Remove e retorna todos os espectadores (para transferi-los a outro pipeline)"""
+        with self._subscriptions_lock:
+            subscriptions, self._subscriptions = self._subscriptions, []
+        return subscriptions
+
+    def start(self):
+        """Inicia a thread de captura e inferência"""
+        self.running = True
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f"camera-pipeline-{self.camera_id}",
+            daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Sinaliza a thread para encerrar e liberar a captura"""
+        self._stop_event.set()
+
+    def _should_render(self) -> bool:
+        # Sem espectadores, os frames não são desenhados nem codificados
+        return self.subscribers > 0
+
+    def _monitored_elsewhere(self) -> bool:
+        from .models import Camera
+
+        cutoff = timezone.now() - timedelta(seconds=settings.CAMERA_MONITOR_HEARTBEAT_TIMEOUT)
+        return Camera.objects.filter(camera_id=self.camera_id, monitored_at__gte=cutoff).exists()
+
+    def _should_persist(self) -> bool:
+        """Pipelines do monitoramento sempre gravam; os de espectadores, só sem monitoramento ativo"""
+        if self.keep_alive:
+            return True
+        now = time.monotonic()
+        if self._persist_checked_at is None or now - self._persist_checked_at >= self.MONITOR_CHECK_INTERVAL:
+            self._persist_checked_at = now
+            try:
+                self._persist = not self._monitored_elsewhere()
+            except Exception as e:
+                print(f"Erro ao verificar o monitoramento da câmera {self.camera_id}: {str(e)}")
+        return self._persist
+
+    def _set_status(self, status: str):
+        from .models import Camera
+
+        camera = Camera.objects.filter(camera_id=self.camera_id).first()
+        # Não sobrescreve câmeras desativadas pelo operador
+        if camera is None or camera.camera_status in (status, Camera.INACTIVE_STATUS):
+            return
+        camera.camera_status = status[:100]
+        camera.save(update_fields=['camera_status', 'updated_at'])
+
+    def _run(self):
+        from .services import CameraService
+
+        retry_delay = settings.CAMERA_MONITOR_RETRY_MIN
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    service = CameraService(self.camera_id)
+                    connected = False
+                    for annotated_frame in service.generate_frames(
+                            self._stop_event, render=self._should_render, persist=self._should_persist):
+                        if not connected:
+                            self.error = None
+                            if self.keep_alive:
+                                self._set_status('active')
+                                retry_delay = settings.CAMERA_MONITOR_RETRY_MIN
+                        connected = True
+                        self._publish(annotated_frame)
+                    if connected and self.keep_alive and not self._stop_event.is_set():
+                        self._set_status('error: stream ended')
+                except Exception as e:
+                    print(f"Erro no pipeline da câmera {self.camera_id}: {str(e)}")
+                    self.error = str(e)
+                    if self.keep_alive:
+                        self._set_status(f"error: {str(e)}")
+                finally:
+                    close_old_connections()
+
+                if not self.keep_alive:
+                    break
+                print(f"Reconectando câmera {self.camera_id} em {retry_delay:g}s")
+                self._stop_event.wait(retry_delay)
+                retry_delay = min(retry_delay * 2, settings.CAMERA_MONITOR_RETRY_MAX)
+        finally:
+            self.running = False
+            self._broadcast(self.END_OF_STREAM)
+            close_old_connections()
+
+    def _publish(self, frame):
+        if not self._subscriptions:
+            return
+        # Codifica uma única vez por frame, independentemente do número de espectadores
+        ret, buffer = cv2.imencode(
+            '.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, settings.CAMERA_STREAM_JPEG_QUALITY]
+        )
+        if not ret:
+            return
+        chunk = (b'--frame\r\n'
+                 b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
+        self._broadcast(chunk)
+
+    def _broadcast(self, chunk):
+        with self._subscriptions_lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            subscription.put(chunk)
+
+
+class CameraStreamHub:
+    """
+    Registro de pipelines por camera_id. Cada câmera tem no máximo uma
+    captura e um loop de inferência por processo, independentemente do
+    número de espectadores.
+    """
+
+    def __init__(self):
+        self._pipelines = {}
+        self._lock = threading.Lock()
+
+    def start_monitoring(self, camera_id: str, restart: bool = False) -> CameraPipeline:
+        """
+        Mantém o pipeline da câmera ativo mesmo sem espectadores
+        Args:
+            restart: Encerra o pipeline em execução e inicia outro (ex.: link ou
+                parâmetros de inferência alterados); os espectadores são transferidos
+        """
+        with self._lock:
+            pipeline = self._pipelines.get(camera_id)
+            if pipeline is not None and pipeline.running and not restart:
+                pipeline.keep_alive = True
+                return pipeline
+            subscriptions = []
+            if pipeline is not None:
+                subscriptions = pipeline.take_subscriptions()
+                pipeline.keep_alive = False
+                pipeline.stop()
+            pipeline = CameraPipeline(camera_id, keep_alive=True)
+            for subscription in subscriptions:
+                pipeline.add_subscription(subscription)
+            self._pipelines[camera_id] = pipeline
+            pipeline.start()
+            return pipeline
+
+    def stop_monitoring(self, camera_id: str):
+        """Libera o pipeline mantido pelo monitoramento; ele termina junto com o último espectador"""
+        with self._lock:
+            pipeline = self._pipelines.get(camera_id)
+            if pipeline is None:
+                return
+            pipeline.keep_alive = False
+            if pipeline.subscribers == 0:
+                pipeline.stop()
+                del self._pipelines[camera_id]
+
+    def subscribe(self, camera_id: str, subscription: FrameSubscription = None):
+        """
+        Obtém (ou inicia) o pipeline da câmera e registra um espectador
+        Returns:
+            Tupla (pipeline, subscription)
+        """
+        if subscription is None:
+            subscription = FrameSubscription(settings.CAMERA_STREAM_QUEUE_SIZE)
+        with self._lock:
+            pipeline = self._pipelines.get(camera_id)
+            if pipeline is None or not pipeline.running:
+                pipeline = CameraPipeline(camera_id)
+                self._pipelines[camera_id] = pipeline
+                pipeline.start()
+            pipeline.add_subscription(subscription)
+            return pipeline, subscription
+
+    def _current(self, pipeline: CameraPipeline, subscription: FrameSubscription) -> CameraPipeline:
+        """Pipeline que atende o espectador; após um reinício, o que o recebeu"""
+        current = self._pipelines.get(pipeline.camera_id)
+        if current is not None and current is not pipeline and current.has_subscription(subscription):
+            return current
+        return pipeline
+
+    def unsubscribe(self, pipeline: CameraPipeline, subscription: FrameSubscription):
+        """Remove um espectador e encerra o pipeline quando não restar nenhum"""
+        with self._lock:
+            pipeline = self._current(pipeline, subscription)
+            pipeline.remove_subscription(subscription)
+            if pipeline.subscribers > 0 or pipeline.keep_alive:
+                return
+            pipeline.stop()
+            if self._pipelines.get(pipeline.camera_id) is pipeline:
+                del self._pipelines[pipeline.camera_id]
+
+    def _unavailable(self, pipeline: CameraPipeline, subscription: FrameSubscription) -> StreamUnavailable:
+        error = self._current(pipeline, subscription).error
+        return StreamUnavailable(error or f"Camera {pipeline.camera_id} did not send any frame")
+
+    def _next_chunk(self, pipeline: CameraPipeline, subscription: FrameSubscription):
+        """Próximo frame do espectador; END_OF_STREAM quando o pipeline terminou"""
+        while True:
+            try:
+                return subscription.get()
+            except queue.Empty:
+                if not self._current(pipeline, subscription).running:
+                    return CameraPipeline.END_OF_STREAM
+
+    async def _anext_chunk(self, pipeline: CameraPipeline, subscription: AsyncFrameSubscription):
+        while True:
+            try:
+                return await subscription.aget()
+            except asyncio.TimeoutError:
+                if not self._current(pipeline, subscription).running:
+                    return CameraPipeline.END_OF_STREAM
+
+    def stream(self, camera_id: str):
+        """
+        Abre o stream MJPEG de uma câmera a partir do pipeline compartilhado,
+        aguardando o primeiro frame por até CAMERA_STREAM_CONNECT_TIMEOUT segundos
+        Returns:
+            Gerador dos frames
+        Raises:
+            StreamUnavailable: se a câmera não entregou nenhum frame
+        """
+        frames = self._frames(camera_id)
+        next(frames)
+        return frames
+
+    def _frames(self, camera_id: str):
+        pipeline, subscription = self.subscribe(camera_id)
+        try:
+            try:
+                chunk = subscription.get(timeout=settings.CAMERA_STREAM_CONNECT_TIMEOUT)
+            except queue.Empty:
+                chunk = CameraPipeline.END_OF_STREAM
+            if chunk is CameraPipeline.END_OF_STREAM:
+                raise self._unavailable(pipeline, subscription)
+            # O primeiro next() retorna aqui, já com a câmera conectada
+            yield
+            while chunk is not CameraPipeline.END_OF_STREAM:
+                yield chunk
+                chunk = self._next_chunk(pipeline, subscription)
+        finally:
+            self.unsubscribe(pipeline, subscription)
+
+    async def astream(self, camera_id: str):
+        """Versão assíncrona de stream(), para servidores ASGI"""
+        frames = self._aframes(camera_id)
+        await anext(frames)
+        return frames
+
+    async def _aframes(self, camera_id: str):
+        subscription = AsyncFrameSubscription(
+            settings.CAMERA_STREAM_QUEUE_SIZE, asyncio.get_running_loop()
+        )
+        pipeline, subscription = self.subscribe(camera_id, subscription)
+        try:
+            try:
+                chunk = await subscription.aget(timeout=settings.CAMERA_STREAM_CONNECT_TIMEOUT)
+            except asyncio.TimeoutError:
+                chunk = CameraPipeline.END_OF_STREAM
+            if chunk is CameraPipeline.END_OF_STREAM:
+                raise self._unavailable(pipeline, subscription)
+            yield
+            while chunk is not CameraPipeline.END_OF_STREAM:
+                yield chunk
+                chunk = await self._anext_chunk(pipeline, subscription)
+        finally:
+            self.unsubscribe(pipeline, subscription)
+
+
+stream_hub = CameraStreamHub()
@@ -0,0 +1,154 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from monitoramento.retention import run_detection_maintenance
+
+from .models import Camera
+from .stream_hub import stream_hub
+
+# Campos lidos por CameraService ao iniciar o pipeline; alterá-los reinicia a câmera
+PIPELINE_FIELDS = (
+    'camera_link', 'inference_stride', 'inference_fps', 'inference_backend',
+    'motion_sensitivity', 'motion_roi', 'inference_roi', 'inference_size', 'class_whitelist',
+)
+
+
+class CameraSupervisor:
+    """
+    Mantém um pipeline de monitoramento (captura, inferência e gravação)
+    para cada câmera cadastrada com status diferente de 'inactive'.
+    A tabela é relida periodicamente: câmeras novas são iniciadas,
+    removidas ou desativadas são encerradas e câmeras com link ou parâmetros
+    de inferência alterados são reiniciadas. Cada sincronização atualiza
+    Camera.monitored_at, para que pipelines abertos por espectadores em
+    outros processos não gravem as mesmas detecções. A manutenção das tabelas de detecções (partições
+    e retenção) roda periodicamente em uma thread separada.
+    """
+
+    def __init__(self, hub=stream_hub, sync_interval: float = 10, camera_ids=None,
+                 maintenance_interval: float = 0):
+        """
+        Args:
+            sync_interval: Intervalo (s) entre leituras da tabela de câmeras
+            camera_ids: Restringe o monitoramento a estas câmeras (None = todas)
+            maintenance_interval: Intervalo (s) entre manutenções das detecções (0 = desativada)
+        """
+        self.hub = hub
+        self.sync_interval = sync_interval
+        self.camera_ids = set(camera_ids) if camera_ids else None
+        self.maintenance_interval = maintenance_interval
+        self._configs = {}
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._maintenance_thread = None
+        self._last_maintenance = None
+
+    @property
+    def monitored(self) -> list:
+        return sorted(self._configs)
+
+    def sync(self):
+        """Aplica o estado atual da tabela de câmeras aos pipelines"""
+        cameras = Camera.objects.exclude(camera_status=Camera.INACTIVE_STATUS)
+        if self.camera_ids is not None:
+            cameras = cameras.filter(camera_id__in=self.camera_ids)
+        wanted = {
+            values[0]: values[1:]
+            for values in cameras.values_list('camera_id', *PIPELINE_FIELDS)
+        }
+        Camera.objects.filter(camera_id__in=list(wanted)).update(monitored_at=timezone.now())
+
+        for camera_id in self._configs:
+            if camera_id not in wanted:
+                print(f"Monitoramento da câmera {camera_id} encerrado")
+                self.hub.stop_monitoring(camera_id)
+
+        for camera_id, config in wanted.items():
+            previous = self._configs.get(camera_id)
+            if previous is None:
+                print(f"Monitoramento da câmera {camera_id} iniciado")
+            elif previous != config:
+                print(f"Configuração da câmera {camera_id} alterada, reiniciando o pipeline")
+            # Também reinicia pipelines que terminaram
+            self.hub.start_monitoring(camera_id, restart=previous is not None and previous != config)
+
+        self._configs = wanted
+
+    def _maintain(self):
+        try:
+            summary = run_detection_maintenance()
+            print(f"Manutenção das detecções concluída: {summary}")
+        except Exception as e:
+            print(f"Erro na manutenção das detecções: {str(e)}")
+        finally:
+            close_old_connections()
+
+    def maybe_maintain(self):
+        """Inicia a manutenção das detecções se o intervalo expirou e nenhuma estiver em andamento"""
+        if not self.maintenance_interval:
+            return
+        if self._maintenance_thread is not None and self._maintenance_thread.is_alive():
+            return
+        now = time.monotonic()
+        if self._last_maintenance is not None and now - self._last_maintenance < self.maintenance_interval:
+            return
+        self._last_maintenance = now
+        self._maintenance_thread = threading.Thread(
+            target=self._maintain, name='detection-maintenance', daemon=True
+        )
+        self._maintenance_thread.start()
+
+    def run(self):
+        """Loop de sincronização; bloqueia até stop()"""
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    self.sync()
+                except Exception as e:
+                    print(f"Erro ao sincronizar câmeras monitoradas: {str(e)}")
+                finally:
+                    close_old_connections()
+                self.maybe_maintain()
+                self._stop_event.wait(self.sync_interval)
+        finally:
+            for camera_id in list(self._configs):
+                self.hub.stop_monitoring(camera_id)
+            if self._configs:
+                # Libera as câmeras para os pipelines dos espectadores sem esperar o timeout
+                try:
+                    Camera.objects.filter(camera_id__in=list(self._configs)).update(monitored_at=None)
+                except Exception as e:
+                    print(f"Erro ao liberar câmeras monitoradas: {str(e)}")
+                finally:
+                    close_old_connections()
+            self._configs = {}
+
+    def start(self):
+        """Executa o loop de sincronização em segundo plano"""
+        self._thread = threading.Thread(target=self.run, name='camera-supervisor', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+_supervisor = None
+
+
+def start_supervisor():
+    """Inicia o monitoramento contínuo no processo web, se configurado"""
+    global _supervisor
+    if not settings.CAMERA_MONITOR_AUTOSTART or _supervisor is not None:
+        return
+    _supervisor = CameraSupervisor(
+        sync_interval=settings.CAMERA_MONITOR_SYNC_INTERVAL,
+        maintenance_interval=settings.DETECTION_MAINTENANCE_INTERVAL_HOURS * 3600
+    )
+    _supervisor.start()
+    print("Monitoramento contínuo das câmeras iniciado")
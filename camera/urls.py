@@ -1,8 +1,10 @@
 from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .views import CameraViewSet
+from .views import CameraViewSet, inference_metrics
 
 router = DefaultRouter()
 router.register(r'cameras', CameraViewSet, basename='camera')
 
-urlpatterns = router.urls
\ No newline at end of file
+urlpatterns = [
+    path('inference/metrics/', inference_metrics),
+] + router.urls
\ No newline at end of file
@@ -2,6 +2,8 @@ from rest_framework import viewsets, status, permissions
 from rest_framework.response import Response
 from .models import Camera
 from .serializers import CameraSerializer
+from .inference_scheduler import scheduler_metrics
+from .inference_service import inference_client_metrics
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.permissions import AllowAny
 
@@ -49,4 +51,14 @@ def camera_status(request, camera_id):
             'last_updated': camera.updated_at
         })
     except Camera.DoesNotExist:
-        return Response({'error': 'Camera not found'}, status=404)
\ No newline at end of file
+        return Response({'error': 'Camera not found'}, status=404)
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@authentication_classes([])
+def inference_metrics(request):
+    """Métricas dos agendadores de inferência em lote e do cliente do serviço de inferência"""
+    return Response({
+        'schedulers': scheduler_metrics(),
+        'service': inference_client_metrics(),
+    })
@@ -13,4 +13,24 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'extracaoimg.settings')
 
-application = get_asgi_application()
+# Inicializa o Django antes de importar consumers/models
+django_asgi_app = get_asgi_application()
+
+from channels.routing import ProtocolTypeRouter, URLRouter
+from channels.security.websocket import AllowedHostsOriginValidator
+from monitoramento.routing import websocket_urlpatterns
+
+application = ProtocolTypeRouter({
+    'http': django_asgi_app,
+    'websocket': AllowedHostsOriginValidator(URLRouter(websocket_urlpatterns)),
+})
+
+# Carrega o modelo YOLO antes do primeiro stream (YOLO_WARMUP=True)
+from camera.model_registry import warmup_models
+
+warmup_models()
+
+# Monitoramento contínuo das câmeras no próprio processo (CAMERA_MONITOR_AUTOSTART=True)
+from camera.supervisor import start_supervisor
+
+start_supervisor()
@@ -54,6 +54,7 @@ if not DEBUG and '*' in ALLOWED_HOSTS:
 # Application definition
 
 INSTALLED_APPS = [
+    'daphne',  # runserver ASGI (deve vir antes de django.contrib.staticfiles)
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -100,6 +101,20 @@ WSGI_APPLICATION = 'extracaoimg.wsgi.application'
 
 ASGI_APPLICATION = 'extracaoimg.asgi.application'
 
+# Channel layer usado para enviar detecções e status via WebSocket.
+# Com mais de um processo, defina REDIS_URL (requer channels_redis).
+if os.getenv('REDIS_URL'):
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {'hosts': [os.getenv('REDIS_URL')]},
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}
+    }
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
@@ -175,6 +190,103 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = os.getenv('MEDIA_URL', '/media/')
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# YOLO model registry
+# Modelos são carregados uma única vez por processo e compartilhados entre câmeras
+YOLO_MODEL_PATH = os.getenv('YOLO_MODEL_PATH', 'yolo11s.pt')
+YOLO_DEVICE = os.getenv('YOLO_DEVICE', '')  # vazio = cuda se disponível, senão cpu
+YOLO_PRECISION = os.getenv('YOLO_PRECISION', 'fp32')  # fp32 ou fp16 (apenas GPU)
+YOLO_WARMUP = os.getenv('YOLO_WARMUP', 'False').lower() == 'true'
+
+# Inference backend
+# torch (ultralytics + PyTorch) ou onnx (ONNX Runtime em CPU, sem carregar o torch).
+# Pode ser sobrescrito por câmera em Camera.inference_backend.
+# Gere o modelo ONNX com: python manage.py export_model [--int8]
+INFERENCE_BACKEND = os.getenv('INFERENCE_BACKEND', 'torch')
+ONNX_MODEL_PATH = os.getenv('ONNX_MODEL_PATH', os.path.splitext(YOLO_MODEL_PATH)[0] + '.onnx')
+ONNX_THREADS = int(os.getenv('ONNX_THREADS', '0'))  # 0 = padrão do onnxruntime (todos os núcleos)
+
+# Batched inference
+# Frames de todas as câmeras são agrupados em micro-lotes por modelo
+INFERENCE_BATCHING = os.getenv('INFERENCE_BATCHING', 'False').lower() == 'true'
+INFERENCE_MAX_BATCH_SIZE = int(os.getenv('INFERENCE_MAX_BATCH_SIZE', '8'))
+INFERENCE_MAX_WAIT_MS = float(os.getenv('INFERENCE_MAX_WAIT_MS', '20'))
+
+# Inference service
+# local: inferência no próprio processo web (desenvolvimento).
+# remote: frames enviados por memória compartilhada ao serviço iniciado com
+#   `python manage.py run_inference_service` (mesma máquina).
+# auto: usa o serviço quando disponível e cai para local caso contrário.
+INFERENCE_SERVICE_MODE = os.getenv('INFERENCE_SERVICE_MODE', 'local')
+INFERENCE_SERVICE_ADDRESS = os.getenv('INFERENCE_SERVICE_ADDRESS', '127.0.0.1:50070')
+# Obrigatória quando o endereço não é de loopback; sem ela, em 127.0.0.1
+# é usada uma chave derivada do SECRET_KEY
+INFERENCE_SERVICE_AUTHKEY = os.getenv('INFERENCE_SERVICE_AUTHKEY', '')
+INFERENCE_SERVICE_WORKERS = int(os.getenv('INFERENCE_SERVICE_WORKERS', '0'))  # 0 = um por núcleo
+INFERENCE_SERVICE_TIMEOUT = float(os.getenv('INFERENCE_SERVICE_TIMEOUT', '10'))
+# Blocos de memória compartilhada (/dev/shm) mantidos por processo cliente
+INFERENCE_SERVICE_MAX_BLOCKS = int(os.getenv('INFERENCE_SERVICE_MAX_BLOCKS', '64'))
+
+# Motion gate
+# Câmeras com motion_sensitivity definido só executam a inferência quando a cena
+# muda; sem movimento, a inferência roda ao menos a cada MOTION_KEEPALIVE_SECONDS
+MOTION_KEEPALIVE_SECONDS = float(os.getenv('MOTION_KEEPALIVE_SECONDS', '30'))
+
+# Camera streaming
+# Cada frame é codificado uma vez por câmera; cada espectador tem uma fila limitada
+CAMERA_STREAM_JPEG_QUALITY = int(os.getenv('CAMERA_STREAM_JPEG_QUALITY', '80'))
+CAMERA_STREAM_QUEUE_SIZE = int(os.getenv('CAMERA_STREAM_QUEUE_SIZE', '2'))
+# Espera máxima (s) pelo primeiro frame antes de responder 503 ao espectador
+CAMERA_STREAM_CONNECT_TIMEOUT = float(os.getenv('CAMERA_STREAM_CONNECT_TIMEOUT', '15'))
+
+# Camera monitoring
+# `python manage.py monitor_cameras` mantém um pipeline por câmera com status
+# diferente de 'inactive', sem depender de espectadores. Com AUTOSTART=True o
+# monitoramento roda dentro do processo web (use apenas com um único processo)
+# e os espectadores se conectam aos pipelines já em execução.
+CAMERA_MONITOR_AUTOSTART = os.getenv('CAMERA_MONITOR_AUTOSTART', 'False').lower() == 'true'
+CAMERA_MONITOR_SYNC_INTERVAL = float(os.getenv('CAMERA_MONITOR_SYNC_INTERVAL', '10'))
+CAMERA_MONITOR_RETRY_MIN = float(os.getenv('CAMERA_MONITOR_RETRY_MIN', '1'))
+CAMERA_MONITOR_RETRY_MAX = float(os.getenv('CAMERA_MONITOR_RETRY_MAX', '60'))
+# O monitoramento registra em Camera.monitored_at a cada sincronização. Pipelines
+# abertos por espectadores em outro processo não gravam detecções de câmeras
+# sincronizadas há menos de CAMERA_MONITOR_HEARTBEAT_TIMEOUT segundos.
+CAMERA_MONITOR_HEARTBEAT_TIMEOUT = float(os.getenv('CAMERA_MONITOR_HEARTBEAT_TIMEOUT', '30'))
+
+# Detection writer
+# Detecções são gravadas em lote (bulk_create) por uma thread em segundo plano
+DETECTION_WRITER_BATCH_SIZE = int(os.getenv('DETECTION_WRITER_BATCH_SIZE', '200'))
+DETECTION_WRITER_FLUSH_INTERVAL = float(os.getenv('DETECTION_WRITER_FLUSH_INTERVAL', '1.0'))
+DETECTION_WRITER_MAX_QUEUE_SIZE = int(os.getenv('DETECTION_WRITER_MAX_QUEUE_SIZE', '10000'))
+DETECTION_WRITER_OVERFLOW_POLICY = os.getenv('DETECTION_WRITER_OVERFLOW_POLICY', 'drop_oldest')
+
+# Detection rollups
+# Contagens por câmera, classe e minuto/hora/dia, atualizadas a cada gravação de
+# detecções e lidas por /api/cameras/<id>/stats/. Recalcule com `backfill_rollups`.
+DETECTION_ROLLUP_MAX_BUCKETS = int(os.getenv('DETECTION_ROLLUP_MAX_BUCKETS', '10000'))
+
+# Detection retention
+# `python manage.py maintain_detections` (e o monitoramento contínuo, a cada
+# DETECTION_MAINTENANCE_INTERVAL_HOURS) aplica a retenção das detecções:
+# DETECTION_RETENTION_DAYS vale para câmeras sem retention_days (0 = sem limite).
+# No MySQL as tabelas usam partições mensais (--init-partitions na primeira vez),
+# criadas com DETECTION_PARTITION_MONTHS_AHEAD meses de antecedência; meses
+# expirados para todas as câmeras são descartados com DROP PARTITION.
+# DETECTION_ARCHIVE_FORMAT (csv ou parquet; vazio = não arquivar) exporta os dados
+# removidos para DETECTION_ARCHIVE_ROOT. Parquet requer pyarrow.
+DETECTION_RETENTION_DAYS = int(os.getenv('DETECTION_RETENTION_DAYS', '0'))
+DETECTION_PARTITION_MONTHS_AHEAD = int(os.getenv('DETECTION_PARTITION_MONTHS_AHEAD', '3'))
+DETECTION_ARCHIVE_FORMAT = os.getenv('DETECTION_ARCHIVE_FORMAT', '')
+DETECTION_ARCHIVE_ROOT = os.getenv('DETECTION_ARCHIVE_ROOT', os.path.join(BASE_DIR, 'archive'))
+DETECTION_MAINTENANCE_INTERVAL_HOURS = float(os.getenv('DETECTION_MAINTENANCE_INTERVAL_HOURS', '24'))
+
+# Detection snapshots
+# Frames anotados são gravados em <SNAPSHOT_ROOT>/<camera>/<AAAA-MM-DD>/
+SNAPSHOT_ROOT = os.getenv('SNAPSHOT_ROOT', os.path.join(BASE_DIR, 'frames'))
+SNAPSHOT_WORKERS = int(os.getenv('SNAPSHOT_WORKERS', '2'))
+SNAPSHOT_JPEG_QUALITY = int(os.getenv('SNAPSHOT_JPEG_QUALITY', '90'))
+SNAPSHOT_RETENTION_DAYS = int(os.getenv('SNAPSHOT_RETENTION_DAYS', '30'))
+SNAPSHOT_MAX_BYTES = int(float(os.getenv('SNAPSHOT_MAX_GB', '10')) * 1024 ** 3) or None
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -14,3 +14,13 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'extracaoimg.settings')
 
 application = get_wsgi_application()
+
+# Carrega o modelo YOLO antes do primeiro stream (YOLO_WARMUP=True)
+from camera.model_registry import warmup_models
+
+warmup_models()
+
+# Monitoramento contínuo das câmeras no próprio processo (CAMERA_MONITOR_AUTOSTART=True)
+from camera.supervisor import start_supervisor
+
+start_supervisor()
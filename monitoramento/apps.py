@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class MonitoramentoConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'monitoramento'
+
+    def ready(self):
+        # Publica detecções e mudanças de status via WebSocket
+        from . import signals  # noqa: F401
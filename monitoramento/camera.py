@@ -1,8 +1,11 @@
 from datetime import datetime, timedelta
-from camera.models import Camera, Detection
-from .object_detector import ObjectDetector
+from camera.capture import LatestFrameReader, redact_url
+from camera.models import Camera as CameraModel
+from camera.object_detector import ObjectDetector
+from .detection_writer import get_detection_writer
+from .models import Detection
+from .snapshots import get_snapshot_store
 import cv2
-import os
 
 class Camera:
     def __init__(self, camera_id: str, url: str = None):
@@ -13,12 +16,12 @@ class Camera:
             url: URL da câmera
         """
         try:
-            self.camera = Camera.objects.get(camera_id=camera_id)
+            self.camera = CameraModel.objects.get(camera_id=camera_id)
             self.url = url or self.camera.camera_link
             self.detector = ObjectDetector()
             self.last_detection_time = None
             self.detection_interval = timedelta(seconds=15)
-        except Camera.DoesNotExist:
+        except CameraModel.DoesNotExist:
             raise ValueError(f"Camera {camera_id} not found")
 
     def get_detections(self, date: str = None):
@@ -29,12 +32,10 @@ class Camera:
         Returns:
             Lista de detecções
         """
-        queryset = Detection.objects.filter(camera=self.camera)
+        queryset = Detection.objects.filter(camera=self.camera).prefetch_related('boxes')
         
         if date:
-            start_date = datetime.strptime(date, '%Y-%m-%d')
-            end_date = start_date + timedelta(days=1)
-            queryset = queryset.filter(timestamp__date=start_date)
+            queryset = queryset.filter(detection_date=datetime.strptime(date, '%Y-%m-%d').date())
             
         return queryset
     
@@ -42,72 +43,63 @@ class Camera:
         """
         Gera frames do stream da câmera com as detecções em tempo real
         """
-        if not os.path.exists('frames'):
-            os.makedirs('frames')
-            
-        cap = cv2.VideoCapture(self.url)
+        cap = LatestFrameReader(self.url, name=self.camera.camera_id)
         
         if not cap.isOpened():
+            cap.release()
             self.camera.camera_status = 'error'
             self.camera.save()
-            raise Exception(f"Não foi possível conectar à câmera: {self.url}")
+            raise Exception(f"Não foi possível conectar à câmera: {redact_url(self.url)}")
             
-        while True:
-            success, frame = cap.read()
-            if not success:
-                break
+        try:
+            while True:
+                success, frame = cap.read()
+                if not success:
+                    break
                 
-            annotated_frame, detections = self.detector.process_image(frame)
-            current_time = datetime.now()
-            detected_objects = []
+                annotated_frame, detections = self.detector.process_image(frame, render=True)
+                current_time = datetime.now()
+                # Rótulo do frame atual; apenas a gravação respeita o intervalo mínimo
+                detected_objects = detections.labels()
             
-            if detections:
-                for detection in detections:
-                    class_name = detection['class_name']
-                    confidence = detection['confidence']
-                    detected_objects.append(f"{class_name} ({confidence:.2%})")
-                
-                if not self.last_detection_time or (current_time - self.last_detection_time) > self.detection_interval:
-                    try:
-                        for detection in detections:
-                            Detection.objects.create(
+                if detections:
+                    if not self.last_detection_time or (current_time - self.last_detection_time) > self.detection_interval:
+                        try:
+                            snapshot_path = get_snapshot_store().save(self.camera.camera_id, annotated_frame, current_time)
+                            detection = Detection(
                                 camera=self.camera,
-                                timestamp=current_time,
-                                class_name=detection['class_name'],
-                                confidence=detection['confidence'],
-                                bbox_x=detection['bbox'][0],
-                                bbox_y=detection['bbox'][1],
-                                bbox_width=detection['bbox'][2],
-                                bbox_height=detection['bbox'][3]
+                                detection_date=current_time.date(),
+                                detection_time=current_time.time(),
+                                snapshot_path=snapshot_path or ''
                             )
+                            detection.set_boxes(detections.to_list())
+                            get_detection_writer().submit(detection)
+                            print(f"Saved detection at {current_time}: {', '.join(detected_objects)}")
                         
-                        frame_path = f"frames/detection_{current_time.strftime('%Y%m%d_%H%M%S')}.jpg"
-                        cv2.imwrite(frame_path, annotated_frame)
-                        print(f"Saved detection at {current_time}: {', '.join(detected_objects)}")
-                        
-                        self.last_detection_time = current_time
+                            self.last_detection_time = current_time
                         
-                    except Exception as e:
-                        print(f"Erro ao salvar detecção: {str(e)}")
+                        except Exception as e:
+                            print(f"Erro ao salvar detecção: {str(e)}")
 
-            if self.last_detection_time:
-                timestamp_text = f"Ultima deteccao: {self.last_detection_time.strftime('%Y-%m-%d %H:%M:%S')}"
-                location_text = f"Local: {self.camera.camera_loc}"
+                if self.last_detection_time:
+                    timestamp_text = f"Ultima deteccao: {self.last_detection_time.strftime('%Y-%m-%d %H:%M:%S')}"
+                    location_text = f"Local: {self.camera.camera_loc}"
                 
-                cv2.putText(annotated_frame, timestamp_text, (10, 30),
-                           cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2, cv2.LINE_AA)
-                cv2.putText(annotated_frame, location_text, (10, 70),
-                           cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2, cv2.LINE_AA)
-                
-                if detected_objects:
-                    objects_text = f"Objetos: {', '.join(detected_objects)}"
-                    cv2.putText(annotated_frame, objects_text, (10, 110),
+                    cv2.putText(annotated_frame, timestamp_text, (10, 30),
+                               cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2, cv2.LINE_AA)
+                    cv2.putText(annotated_frame, location_text, (10, 70),
                                cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2, cv2.LINE_AA)
+                
+                    if detected_objects:
+                        objects_text = f"Objetos: {', '.join(detected_objects)}"
+                        cv2.putText(annotated_frame, objects_text, (10, 110),
+                                   cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2, cv2.LINE_AA)
 
-            ret, buffer = cv2.imencode('.jpg', annotated_frame)
-            frame_bytes = buffer.tobytes()
+                ret, buffer = cv2.imencode('.jpg', annotated_frame)
+                frame_bytes = buffer.tobytes()
             
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-
-        cap.release()
+                yield (b'--frame\r\n'
+                       b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+        finally:
+            # Também quando o cliente desconecta (GeneratorExit)
+            cap.release()
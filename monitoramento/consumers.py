@@ -0,0 +1,50 @@
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from camera.models import Camera
+from .events import camera_group_name, camera_status_payload
+from .models import Detection
+from .serializers import DetectionSerializer
+
+
+class CameraEventsConsumer(AsyncJsonWebsocketConsumer):
+    """
+    WebSocket por câmera. Envia um retrato inicial (status e últimas
+    detecções) na conexão e, depois, apenas os eventos novos, sem polling.
+    """
+
+    recent_detections = 3
+
+    async def connect(self):
+        self.camera_id = self.scope['url_route']['kwargs']['camera_id']
+        snapshot = await self.get_snapshot()
+        if snapshot is None:
+            await self.close(code=4404)
+            return
+
+        self.group_name = camera_group_name(self.camera_id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        await self.send_json({'type': 'snapshot', **snapshot})
+
+    async def disconnect(self, code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    @database_sync_to_async
+    def get_snapshot(self):
+        try:
+            camera = Camera.objects.get(camera_id=self.camera_id)
+        except Camera.DoesNotExist:
+            return None
+        detections = Detection.objects.filter(camera=camera).prefetch_related('boxes')[:self.recent_detections]
+        return {
+            'camera': camera_status_payload(camera),
+            'detections': DetectionSerializer(detections, many=True).data,
+        }
+
+    async def detection_created(self, event):
+        await self.send_json({'type': 'detection', 'detection': event['detection']})
+
+    async def camera_status(self, event):
+        await self.send_json({'type': 'camera_status', 'camera': event['camera']})
@@ -0,0 +1,160 @@
+import atexit
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.dispatch import Signal
+
+# Enviado após cada bulk_create (post_save não é disparado em inserções em lote).
+# Argumentos: sender=classe do model, instances=lista de objetos gravados
+detections_flushed = Signal()
+
+OVERFLOW_POLICIES = ('drop_oldest', 'drop_newest', 'block')
+
+
+class DetectionWriter:
+    """
+    Gravador assíncrono de detecções. Os produtores (loops de frames)
+    apenas enfileiram instâncias não salvas; uma thread em segundo plano as
+    grava com bulk_create em lotes limitados por tamanho e por tempo.
+    """
+
+    def __init__(self, batch_size: int = 200, flush_interval: float = 1.0,
+                 max_queue_size: int = 10000, overflow_policy: str = 'drop_oldest'):
+        """
+        Args:
+            batch_size: Máximo de registros por bulk_create
+            flush_interval: Tempo máximo (s) que um registro espera na fila
+            max_queue_size: Capacidade da fila
+            overflow_policy: drop_oldest, drop_newest ou block quando a fila está cheia
+        """
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Invalid overflow policy: {overflow_policy}")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue_size = max_queue_size
+        self.overflow_policy = overflow_policy
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._flush_latencies = deque(maxlen=100)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='detection-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, instance) -> bool:
+        """
+        Enfileira uma instância não salva para gravação
+        Returns:
+            False se o registro foi descartado pela política de overflow
+        """
+        with self._condition:
+            if self._closed:
+                return False
+            if len(self._queue) >= self.max_queue_size:
+                if self.overflow_policy == 'drop_newest':
+                    self.dropped += 1
+                    return False
+                if self.overflow_policy == 'drop_oldest':
+                    self._queue.popleft()
+                    self.dropped += 1
+                else:
+                    self._condition.wait_for(
+                        lambda: len(self._queue) < self.max_queue_size or self._closed
+                    )
+                    if self._closed:
+                        return False
+            self._queue.append((time.monotonic(), instance))
+            self._condition.notify_all()
+            return True
+
+    def _next_batch(self):
+        with self._condition:
+            self._condition.wait_for(lambda: self._queue or self._closed)
+            if not self._queue:
+                return []
+            # Aguarda completar o lote até o prazo do registro mais antigo
+            deadline = self._queue[0][0] + self.flush_interval
+            while len(self._queue) < self.batch_size and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            count = min(self.batch_size, len(self._queue))
+            batch = [self._queue.popleft()[1] for _ in range(count)]
+            self._condition.notify_all()
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            self._flush(batch)
+
+    def _flush(self, batch):
+        started_at = time.monotonic()
+        by_model = {}
+        for instance in batch:
+            by_model.setdefault(type(instance), []).append(instance)
+
+        for model, instances in by_model.items():
+            try:
+                # Eventos com caixas (Detection) gravam as duas tabelas na mesma transação
+                bulk_create = getattr(model.objects, 'bulk_create_with_boxes', model.objects.bulk_create)
+                created = bulk_create(instances)
+                self.written += len(created)
+                detections_flushed.send(sender=model, instances=created)
+            except Exception as e:
+                self.failed += len(instances)
+                print(f"Erro ao gravar {len(instances)} detecções: {str(e)}")
+            finally:
+                close_old_connections()
+
+        self.flushes += 1
+        self._flush_latencies.append(time.monotonic() - started_at)
+
+    def close(self, timeout: float = 10.0):
+        """Grava o que restar na fila e encerra a thread"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+
+    def metrics(self) -> dict:
+        latencies = list(self._flush_latencies)
+        return {
+            'backlog': len(self._queue),
+            'max_queue_size': self.max_queue_size,
+            'overflow_policy': self.overflow_policy,
+            'written': self.written,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'flushes': self.flushes,
+            'avg_flush_latency_ms': sum(latencies) / len(latencies) * 1000 if latencies else 0,
+            'max_flush_latency_ms': max(latencies) * 1000 if latencies else 0,
+        }
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_detection_writer() -> DetectionWriter:
+    """Gravador compartilhado do processo, iniciado no primeiro uso"""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = DetectionWriter(
+                batch_size=settings.DETECTION_WRITER_BATCH_SIZE,
+                flush_interval=settings.DETECTION_WRITER_FLUSH_INTERVAL,
+                max_queue_size=settings.DETECTION_WRITER_MAX_QUEUE_SIZE,
+                overflow_policy=settings.DETECTION_WRITER_OVERFLOW_POLICY
+            )
+            atexit.register(_writer.close)
+        return _writer
@@ -0,0 +1,47 @@
+import re
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+from .serializers import DetectionSerializer
+
+
+def camera_group_name(camera_id: str) -> str:
+    """Nome do grupo do channel layer que recebe os eventos de uma câmera"""
+    # Grupos aceitam apenas letras, números, hífen, sublinhado e ponto
+    return f"camera_{re.sub(r'[^A-Za-z0-9_.-]', '_', camera_id)}"[:99]
+
+
+def camera_status_payload(camera) -> dict:
+    return {
+        'camera_id': camera.camera_id,
+        'camera_status': camera.camera_status,
+        'camera_loc': camera.camera_loc,
+        'last_updated': camera.updated_at.isoformat() if camera.updated_at else None,
+    }
+
+
+def _group_send(camera_id: str, message: dict):
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    try:
+        async_to_sync(channel_layer.group_send)(camera_group_name(camera_id), message)
+    except Exception as e:
+        print(f"Erro ao publicar evento da câmera {camera_id}: {str(e)}")
+
+
+def publish_detection(detection):
+    """Envia uma nova detecção aos dashboards conectados à câmera"""
+    _group_send(detection.camera.camera_id, {
+        'type': 'detection.created',
+        'detection': DetectionSerializer(detection).data,
+    })
+
+
+def publish_camera_status(camera):
+    """Envia o status atual da câmera aos dashboards conectados"""
+    _group_send(camera.camera_id, {
+        'type': 'camera.status',
+        'camera': camera_status_payload(camera),
+    })
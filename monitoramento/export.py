@@ -0,0 +1,260 @@
+import csv
+import importlib.util
+import io
+import json
+import os
+import zlib
+from itertools import islice
+
+from django.db.models import Q
+
+# Uma linha por caixa detectada, com os dados do evento repetidos
+EXPORT_COLUMNS = (
+    'detection_id', 'camera_id', 'detection_date', 'detection_time', 'class_name',
+    'confidence', 'x1', 'y1', 'x2', 'y2', 'snapshot_path',
+)
+EXPORT_FORMATS = ('ndjson', 'csv', 'parquet')
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+}
+FILE_EXTENSIONS = {'ndjson': '.ndjson', 'csv': '.csv', 'parquet': '.parquet'}
+ARCHIVE_FORMATS = ('csv', 'parquet')
+
+# Linhas acumuladas antes de cada bloco enviado (NDJSON/CSV) ou grupo de linhas (Parquet)
+ROWS_PER_CHUNK = 1000
+PARQUET_ROW_GROUP_SIZE = 50000
+
+
+def keyset_rows(queryset, keys, fields, chunk_size: int = 2000):
+    """
+    Percorre um QuerySet em blocos paginados por chave: cada bloco é uma
+    consulta curta que continua depois da última chave lida, e a memória fica
+    constante mesmo no MySQL, cujo driver carrega o resultado inteiro de uma
+    consulta (o que também vale para QuerySet.iterator()).
+    Args:
+        keys: Campos da ordenação; juntos precisam ser únicos (ex.: terminar em 'pk')
+        fields: Demais campos lidos
+    Returns:
+        Iterador de tuplas keys + fields, em ordem crescente de keys
+    """
+    queryset = queryset.order_by(*keys)
+    last = None
+    while True:
+        chunk = queryset
+        if last is not None:
+            # (a, b, c) > (x, y, z) sem comparação de tuplas, que não usa os índices em todos os bancos
+            after = Q()
+            for index, key in enumerate(keys):
+                after |= Q(**dict(zip(keys[:index], last[:index])), **{f"{key}__gt": last[index]})
+            chunk = chunk.filter(after)
+        rows = list(chunk.values_list(*keys, *fields)[:chunk_size])
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        last = rows[-1][:len(keys)]
+
+
+def detection_rows(boxes, chunk_size: int = 2000):
+    """
+    Lê as caixas em ordem cronológica, em blocos paginados por chave
+    (data, hora, id) sobre os índices de data e hora (ver keyset_rows)
+    Args:
+        boxes: QuerySet de DetectionBox já filtrado
+    Returns:
+        Iterador de tuplas na ordem de EXPORT_COLUMNS
+    """
+    rows = keyset_rows(
+        boxes, ('detection_date', 'detection_time', 'pk'),
+        ('detection_id', 'camera__camera_id', 'object_class__name',
+         'confidence', 'x1', 'y1', 'x2', 'y2', 'detection__snapshot_path'),
+        chunk_size
+    )
+    for (detection_date, detection_time, _, detection_id, camera_id, class_name,
+         confidence, x1, y1, x2, y2, snapshot_path) in rows:
+        yield (detection_id, camera_id, detection_date, detection_time, class_name,
+               confidence, x1, y1, x2, y2, snapshot_path)
+
+
+def iter_ndjson(rows):
+    """Um objeto JSON por linha, em blocos de bytes"""
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, ROWS_PER_CHUNK))
+        if not chunk:
+            return
+        yield ''.join(
+            json.dumps(dict(zip(EXPORT_COLUMNS, row)), default=str) + '\n' for row in chunk
+        ).encode()
+
+
+def iter_csv(rows):
+    """CSV com cabeçalho, em blocos de bytes"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, ROWS_PER_CHUNK))
+        writer.writerows(chunk)
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        if not chunk:
+            return
+
+
+def parquet_schema():
+    import pyarrow as pa
+    return pa.schema([
+        ('detection_id', pa.int64()),
+        ('camera_id', pa.string()),
+        ('detection_date', pa.date32()),
+        ('detection_time', pa.time64('us')),
+        ('class_name', pa.string()),
+        ('confidence', pa.float32()),
+        ('x1', pa.int16()),
+        ('y1', pa.int16()),
+        ('x2', pa.int16()),
+        ('y2', pa.int16()),
+        ('snapshot_path', pa.string()),
+    ])
+
+
+class _ChunkSink:
+    """Arquivo somente de escrita cujo conteúdo é retirado a cada grupo de linhas"""
+
+    closed = False
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def parquet_available() -> bool:
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def iter_parquet(rows, row_group_size: int = PARQUET_ROW_GROUP_SIZE):
+    """Parquet (zstd) gerado grupo a grupo; requer pyarrow"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError('Parquet requer o pacote pyarrow (pip install pyarrow)')
+
+    schema = parquet_schema()
+    sink = _ChunkSink()
+    rows = iter(rows)
+    with pq.ParquetWriter(sink, schema, compression='zstd') as writer:
+        while True:
+            chunk = list(islice(rows, row_group_size))
+            if not chunk:
+                break
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(zip(*chunk), schema)],
+                schema=schema
+            ))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def iter_gzip(chunks):
+    """Compacta um fluxo de blocos de bytes no formato gzip"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_chunks(rows, export_format: str, compress: bool = False):
+    """
+    Args:
+        export_format: ndjson, csv ou parquet
+        compress: Compacta com gzip (ignorado no Parquet, já compactado)
+    Returns:
+        Iterador de blocos de bytes do arquivo
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Invalid export format: {export_format}. Use ndjson, csv or parquet")
+    if export_format == 'parquet':
+        return iter_parquet(rows)
+    chunks = iter_ndjson(rows) if export_format == 'ndjson' else iter_csv(rows)
+    return iter_gzip(chunks) if compress else chunks
+
+
+def content_type(export_format: str, compress: bool = False) -> str:
+    if compress and export_format != 'parquet':
+        return 'application/gzip'
+    return CONTENT_TYPES[export_format]
+
+
+def export_filename(name: str, export_format: str, compress: bool = False) -> str:
+    extension = FILE_EXTENSIONS[export_format]
+    if compress and export_format != 'parquet':
+        extension += '.gz'
+    return name + extension
+
+
+def write_archive(rows, directory: str, name: str, archive_format: str = 'csv'):
+    """
+    Grava um arquivo compactado (csv.gz ou Parquet) com as linhas; nada é criado se não houver linhas
+    Args:
+        name: Nome do arquivo sem extensão
+    Returns:
+        Tupla (caminho do arquivo ou None, linhas gravadas)
+    """
+    if archive_format not in ARCHIVE_FORMATS:
+        raise ValueError(f"Invalid archive format: {archive_format}")
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, export_filename(name, archive_format, compress=True))
+    if os.path.exists(path):
+        raise FileExistsError(f"Arquivo de arquivamento já existe: {path}")
+
+    count = 0
+
+    def counted(rows):
+        nonlocal count
+        for row in rows:
+            count += 1
+            yield row
+
+    # Escreve em um arquivo temporário para não deixar arquivos pela metade
+    temporary_path = path + '.tmp'
+    try:
+        with open(temporary_path, 'wb') as f:
+            for chunk in export_chunks(counted(rows), archive_format, compress=True):
+                f.write(chunk)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+    if not count:
+        os.remove(temporary_path)
+        return None, 0
+    os.replace(temporary_path, path)
+    return path, count
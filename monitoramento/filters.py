@@ -0,0 +1,106 @@
+from datetime import datetime, time
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import ObjectClass
+
+
+def parse_datetime_param(request, name: str, end_of_day: bool = False):
+    """
+    Lê um parâmetro de data/hora ISO 8601 (ex.: 2025-06-02T14:30 ou 2025-06-02)
+    Args:
+        end_of_day: Para datas sem hora, usa 23:59:59.999999 em vez de 00:00
+    Returns:
+        datetime ingênuo no fuso do servidor, ou None se ausente
+    """
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    return parse_datetime_value(value, name, end_of_day)
+
+
+def parse_datetime_value(value: str, name: str, end_of_day: bool = False) -> datetime:
+    """
+    Converte uma data/hora ISO 8601 como parse_datetime_param
+    Raises:
+        ValueError: se o valor não for uma data ou data/hora ISO 8601
+    """
+    try:
+        parsed_date = parse_date(value)
+        parsed = parse_datetime(value) if parsed_date is None else None
+    except ValueError:
+        parsed_date = parsed = None
+    if parsed_date is not None:
+        parsed = datetime.combine(parsed_date, time.max if end_of_day else time.min)
+    elif parsed is None:
+        raise ValueError(f"Invalid {name}. Use ISO 8601 (YYYY-MM-DD[THH:MM[:SS]])")
+
+    # Detecções são gravadas com data/hora locais, sem fuso
+    if timezone.is_aware(parsed):
+        parsed = timezone.make_naive(parsed)
+    return parsed
+
+
+def filter_datetime_range(queryset, since: datetime = None, until: datetime = None):
+    """Filtra detecções em [since, until] usando os campos de data e hora"""
+    if since:
+        queryset = queryset.filter(
+            Q(detection_date__gt=since.date()) |
+            Q(detection_date=since.date(), detection_time__gte=since.time())
+        )
+    if until:
+        queryset = queryset.filter(
+            Q(detection_date__lt=until.date()) |
+            Q(detection_date=until.date(), detection_time__lte=until.time())
+        )
+    return queryset
+
+
+def parse_list_param(request, name: str) -> list:
+    """Valores de um parâmetro repetido e/ou separado por vírgulas"""
+    return [
+        item.strip()
+        for value in request.query_params.getlist(name)
+        for item in value.split(',') if item.strip()
+    ]
+
+
+def parse_box_filters(request) -> dict:
+    """
+    Lê class_name (vários), min_confidence e roi (x1,y1,x2,y2 em pixels)
+    Returns:
+        Filtros de DetectionBox aplicados a uma mesma caixa (vazio = sem filtro por caixa)
+    """
+    filters = {}
+
+    class_names = parse_list_param(request, 'class_name')
+    if class_names:
+        # Ids resolvidos antes: a consulta das caixas não precisa de join com as classes
+        filters['object_class_id__in'] = list(
+            ObjectClass.objects.filter(name__in=class_names).values_list('pk', flat=True)
+        )
+
+    min_confidence = request.query_params.get('min_confidence')
+    if min_confidence:
+        try:
+            min_confidence = float(min_confidence)
+        except ValueError:
+            min_confidence = None
+        if min_confidence is None or not 0 <= min_confidence <= 1:
+            raise ValueError("Invalid min_confidence. Use a number between 0 and 1")
+        filters['confidence__gte'] = min_confidence
+
+    roi = request.query_params.get('roi')
+    if roi:
+        try:
+            x1, y1, x2, y2 = (round(float(value)) for value in roi.split(','))
+        except ValueError:
+            x1 = x2 = y1 = y2 = 0
+        if x1 >= x2 or y1 >= y2:
+            raise ValueError("Invalid roi. Use x1,y1,x2,y2 in pixels, with x1 < x2 and y1 < y2")
+        # Caixas que têm alguma interseção com a região
+        filters.update(x1__lt=x2, x2__gt=x1, y1__lt=y2, y2__gt=y1)
+
+    return filters
@@ -0,0 +1,86 @@
+from datetime import date, datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from camera.models import Camera
+from monitoramento.export import keyset_rows
+from monitoramento.models import DetectionBox, DetectionRollup
+from monitoramento.rollups import GRANULARITIES, RollupBatch, add_detection_boxes, bucket_value
+
+
+class Command(BaseCommand):
+    help = ('Recalcula os rollups a partir das caixas detectadas. '
+            'Os rollups do período são apagados e refeitos; para o dia corrente, '
+            'execute com o monitoramento parado para não perder incrementos.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--camera', action='append', dest='cameras',
+                            help='camera_id a recalcular (pode ser repetido; padrão: todas)')
+        parser.add_argument('--since', help='Primeiro dia (YYYY-MM-DD; padrão: desde o início)')
+        parser.add_argument('--until', help='Último dia, inclusive (YYYY-MM-DD; padrão: até hoje)')
+        parser.add_argument('--granularity', action='append', dest='granularities', choices=GRANULARITIES,
+                            help='Granularidade a recalcular (pode ser repetido; padrão: todas)')
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help='Registros lidos por vez e agregados antes de cada gravação')
+
+    def parse_day(self, value: str) -> date:
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise CommandError(f"Data inválida: {value}. Use YYYY-MM-DD")
+
+    def handle(self, *args, **options):
+        cameras = Camera.objects.all()
+        if options['cameras']:
+            cameras = cameras.filter(camera_id__in=options['cameras'])
+            if not cameras.exists():
+                raise CommandError('Nenhuma câmera encontrada')
+        camera_pks = list(cameras.values_list('pk', flat=True))
+        granularities = tuple(options['granularities'] or GRANULARITIES)
+        since = self.parse_day(options['since']) if options['since'] else None
+        until = self.parse_day(options['until']) if options['until'] else None
+        chunk_size = options['chunk_size']
+
+        # Os limites são dias inteiros, alinhados com todas as granularidades
+        start = bucket_value(datetime.combine(since, time.min)) if since else None
+        end = bucket_value(datetime.combine(until + timedelta(days=1), time.min)) if until else None
+
+        rollups = DetectionRollup.objects.filter(camera_id__in=camera_pks, granularity__in=granularities)
+        if start:
+            rollups = rollups.filter(bucket_start__gte=start)
+        if end:
+            rollups = rollups.filter(bucket_start__lt=end)
+        deleted, _ = rollups.delete()
+        self.stdout.write(f"{deleted} rollups removidos")
+
+        batch = RollupBatch(granularities)
+        boxes = DetectionBox.objects.filter(camera_id__in=camera_pks)
+        if since:
+            boxes = boxes.filter(detection_date__gte=since)
+        if until:
+            boxes = boxes.filter(detection_date__lte=until)
+        # Ordem por evento, para que as caixas de um frame fiquem juntas
+        rows = keyset_rows(
+            boxes, ('detection_id', 'pk'),
+            ('camera_id', 'detection_date', 'detection_time', 'object_class_id', 'confidence'),
+            chunk_size
+        )
+
+        total = 0
+        pending = []
+        for detection_id, _, *values in rows:
+            # Só grava entre eventos, para não dividir as caixas de um mesmo frame
+            if len(pending) >= chunk_size and pending[-1][0] != detection_id:
+                add_detection_boxes(batch, pending)
+                batch.apply()
+                pending = []
+                self.stdout.write(f"{total} caixas processadas...")
+            pending.append((detection_id, *values))
+            total += 1
+        add_detection_boxes(batch, pending)
+        batch.apply()
+        self.stdout.write(f"{total} caixas processadas")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rollups recalculados: {DetectionRollup.objects.filter(camera_id__in=camera_pks).count()} linhas"
+        ))
@@ -0,0 +1,70 @@
+import sys
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from camera.models import Camera
+from monitoramento.export import EXPORT_FORMATS, detection_rows, export_chunks, parquet_available
+from monitoramento.filters import filter_datetime_range, parse_datetime_value
+from monitoramento.models import DetectionBox, ObjectClass
+
+
+class Command(BaseCommand):
+    help = ('Exporta as caixas detectadas (uma linha por caixa) em NDJSON, CSV ou Parquet, '
+            'lendo o banco em blocos, com memória constante para qualquer período.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--camera', action='append', dest='cameras',
+                            help='camera_id a exportar (pode ser repetido; padrão: todas)')
+        parser.add_argument('--since', help='Início (YYYY-MM-DD ou YYYY-MM-DDTHH:MM[:SS])')
+        parser.add_argument('--until', help='Fim, inclusive (YYYY-MM-DD ou YYYY-MM-DDTHH:MM[:SS])')
+        parser.add_argument('--class-name', action='append', dest='class_names',
+                            help='Classe a exportar (pode ser repetido; padrão: todas)')
+        parser.add_argument('--min-confidence', type=float, help='Confiança mínima das caixas (0 a 1)')
+        parser.add_argument('--format', dest='export_format', choices=EXPORT_FORMATS, default='ndjson',
+                            help='Formato do arquivo (padrão: ndjson)')
+        parser.add_argument('--gzip', action='store_true', help='Compacta com gzip (ignorado no Parquet)')
+        parser.add_argument('--output', default='-', help='Arquivo de saída (padrão: saída padrão)')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Caixas lidas por consulta')
+
+    def parse_moment(self, value: str, name: str, end_of_day: bool = False) -> datetime:
+        try:
+            return parse_datetime_value(value, name, end_of_day)
+        except ValueError:
+            raise CommandError(f"Data inválida em --{name}: {value}. Use YYYY-MM-DD ou YYYY-MM-DDTHH:MM[:SS]")
+
+    def handle(self, *args, **options):
+        export_format = options['export_format']
+        if export_format == 'parquet' and not parquet_available():
+            raise CommandError('Parquet requer o pacote pyarrow (pip install pyarrow)')
+
+        boxes = DetectionBox.objects.all()
+        if options['cameras']:
+            camera_pks = list(Camera.objects.filter(camera_id__in=options['cameras']).values_list('pk', flat=True))
+            if not camera_pks:
+                raise CommandError('Nenhuma câmera encontrada')
+            boxes = boxes.filter(camera_id__in=camera_pks)
+        if options['class_names']:
+            boxes = boxes.filter(object_class__in=ObjectClass.objects.filter(name__in=options['class_names']))
+        if options['min_confidence'] is not None:
+            if not 0 <= options['min_confidence'] <= 1:
+                raise CommandError('--min-confidence deve estar entre 0 e 1')
+            boxes = boxes.filter(confidence__gte=options['min_confidence'])
+        since = self.parse_moment(options['since'], 'since') if options['since'] else None
+        until = self.parse_moment(options['until'], 'until', end_of_day=True) if options['until'] else None
+        boxes = filter_datetime_range(boxes, since, until)
+
+        chunks = export_chunks(detection_rows(boxes, options['chunk_size']), export_format, options['gzip'])
+        output = options['output']
+        if output == '-':
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+            return
+
+        size = 0
+        with open(output, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+                size += len(chunk)
+        self.stderr.write(self.style.SUCCESS(f"Exportação gravada em {output} ({size} bytes)"))
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from monitoramento.export import ARCHIVE_FORMATS
+from monitoramento.retention import run_detection_maintenance
+
+
+class Command(BaseCommand):
+    help = ('Mantém as partições mensais das tabelas de detecções (MySQL) e aplica a retenção '
+            'por câmera, arquivando os dados removidos quando configurado')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--init-partitions', action='store_true',
+                            help='Particiona as tabelas ainda não particionadas (reescreve as tabelas)')
+        parser.add_argument('--months-ahead', type=int, default=settings.DETECTION_PARTITION_MONTHS_AHEAD,
+                            help='Meses futuros com partição já criada')
+        parser.add_argument('--archive-format', default=settings.DETECTION_ARCHIVE_FORMAT,
+                            help='csv ou parquet (vazio = não arquivar)')
+        parser.add_argument('--archive-root', default=settings.DETECTION_ARCHIVE_ROOT,
+                            help='Diretório dos arquivos gerados')
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Detecções apagadas por DELETE fora das partições descartadas')
+        parser.add_argument('--dry-run', action='store_true', help='Apenas informa o que seria feito')
+
+    def handle(self, *args, **options):
+        if options['archive_format'] and options['archive_format'] not in ARCHIVE_FORMATS:
+            raise CommandError(f"Formato inválido: {options['archive_format']}. Use csv ou parquet")
+        summary = run_detection_maintenance(
+            init_partitions=options['init_partitions'],
+            months_ahead=options['months_ahead'],
+            archive_format=options['archive_format'],
+            archive_root=options['archive_root'],
+            chunk_size=options['chunk_size'],
+            dry_run=options['dry_run'],
+            log=self.stdout.write
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Partições descartadas: {len(summary['dropped_partitions'])} | "
+            f"detecções apagadas: {summary['deleted_detections']}"
+        ))
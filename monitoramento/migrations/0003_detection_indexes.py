@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('camera', '0003_camera_inference_rate'),
+        ('monitoramento', '0002_alter_detection_camera_alter_detection_table'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='detection',
+            index=models.Index(fields=['camera', 'detection_date', 'detection_time'], name='monitoring_cam_date_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='detection',
+            index=models.Index(fields=['detection_date', 'detection_time'], name='monitoring_date_time_idx'),
+        ),
+    ]
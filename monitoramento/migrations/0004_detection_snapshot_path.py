@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoramento', '0003_detection_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='detection',
+            name='snapshot_path',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('camera', '0006_camera_inference_input'),
+        ('monitoramento', '0004_detection_snapshot_path'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DetectionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('minute', 'Minuto'), ('hour', 'Hora'), ('day', 'Dia')], max_length=6)),
+                ('bucket_start', models.DateTimeField()),
+                ('class_name', models.CharField(max_length=100)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('frames', models.PositiveIntegerField(default=0)),
+                ('max_count', models.PositiveIntegerField(default=0)),
+                ('confidence_sum', models.FloatField(default=0)),
+                ('max_confidence', models.FloatField(default=0)),
+                ('camera', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='detection_rollups', to='camera.camera')),
+            ],
+            options={
+                'db_table': 'monitoring_detection_rollups',
+                'ordering': ['granularity', 'bucket_start', 'class_name'],
+                'constraints': [models.UniqueConstraint(fields=('camera', 'granularity', 'bucket_start', 'class_name'), name='monitoring_rollup_bucket_uniq')],
+            },
+        ),
+    ]
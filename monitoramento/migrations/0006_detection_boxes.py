@@ -0,0 +1,153 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:02
+
+from itertools import groupby
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+from monitoramento.export import keyset_rows
+
+BATCH_SIZE = 2000
+
+
+def clamp(value) -> int:
+    return min(max(round(value), -32768), 32767)
+
+
+def copy_detections(apps, schema_editor):
+    """Copia as caixas do JSON de monitoring_detections e das linhas de camera_detections"""
+    Detection = apps.get_model('monitoramento', 'Detection')
+    DetectionBox = apps.get_model('monitoramento', 'DetectionBox')
+    ObjectClass = apps.get_model('monitoramento', 'ObjectClass')
+    CameraDetection = apps.get_model('camera', 'Detection')
+    class_ids = {}
+
+    def class_id(name, model_class_id=None):
+        if name not in class_ids:
+            object_class = ObjectClass.objects.get_or_create(name=name)[0]
+            class_ids[name] = object_class.pk
+        if model_class_id is not None:
+            ObjectClass.objects.filter(pk=class_ids[name], model_class_id__isnull=True).update(
+                model_class_id=model_class_id
+            )
+        return class_ids[name]
+
+    boxes = []
+
+    def add_box(detection_id, camera_id, detection_date, detection_time, name, confidence, bbox,
+                model_class_id=None):
+        x1, y1, x2, y2 = (clamp(value) for value in bbox)
+        boxes.append(DetectionBox(
+            detection_id=detection_id, camera_id=camera_id, object_class_id=class_id(name, model_class_id),
+            detection_date=detection_date, detection_time=detection_time,
+            confidence=confidence, x1=x1, y1=y1, x2=x2, y2=y2
+        ))
+        if len(boxes) >= BATCH_SIZE:
+            DetectionBox.objects.bulk_create(boxes)
+            boxes.clear()
+
+    # Blocos paginados por chave: iterator() carregaria a tabela inteira no MySQL
+    rows = keyset_rows(
+        Detection.objects.all(), ('detection_id',),
+        ('camera_id', 'detection_date', 'detection_time', 'detections'), BATCH_SIZE
+    )
+    for detection_id, camera_id, detection_date, detection_time, detections in rows:
+        for item in detections or []:
+            add_box(detection_id, camera_id, detection_date, detection_time,
+                    item['class_name'], item.get('confidence', 0), item.get('bbox') or [0, 0, 0, 0],
+                    item.get('class_id'))
+
+    # camera_detections: uma linha por caixa; caixas com o mesmo timestamp formam um evento.
+    # bbox_x/y/width/height guardavam x1, y1, x2, y2 (assim eram gravados)
+    rows = keyset_rows(
+        CameraDetection.objects.all(), ('camera_id', 'timestamp', 'pk'),
+        ('class_name', 'confidence', 'bbox_x', 'bbox_y', 'bbox_width', 'bbox_height'), BATCH_SIZE
+    )
+    for (camera_id, timestamp), group in groupby(rows, key=lambda row: row[:2]):
+        if timezone.is_aware(timestamp):
+            timestamp = timezone.make_naive(timestamp)
+        detection = Detection.objects.create(
+            camera_id=camera_id, detection_date=timestamp.date(), detection_time=timestamp.time(), detections=[]
+        )
+        for _, _, _, name, confidence, *bbox in group:
+            add_box(detection.pk, camera_id, detection.detection_date, detection.detection_time,
+                    name, confidence, bbox)
+
+    DetectionBox.objects.bulk_create(boxes)
+
+
+def restore_detections(apps, schema_editor):
+    """Reconstrói o JSON de monitoring_detections a partir das caixas"""
+    Detection = apps.get_model('monitoramento', 'Detection')
+    DetectionBox = apps.get_model('monitoramento', 'DetectionBox')
+    classes = {
+        pk: (name, model_class_id)
+        for pk, name, model_class_id in apps.get_model('monitoramento', 'ObjectClass').objects.values_list(
+            'pk', 'name', 'model_class_id'
+        )
+    }
+
+    rows = keyset_rows(
+        DetectionBox.objects.all(), ('detection_id', 'pk'),
+        ('object_class_id', 'confidence', 'x1', 'y1', 'x2', 'y2'), BATCH_SIZE
+    )
+    for detection_id, group in groupby(rows, key=lambda row: row[0]):
+        Detection.objects.filter(pk=detection_id).update(detections=[
+            {'class_id': classes[pk][1], 'class_name': classes[pk][0], 'confidence': confidence, 'bbox': bbox}
+            for _, _, pk, confidence, *bbox in group
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('camera', '0006_camera_inference_input'),
+        ('monitoramento', '0005_detection_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ObjectClass',
+            fields=[
+                ('id', models.SmallAutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('model_class_id', models.SmallIntegerField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'monitoring_object_classes',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DetectionBox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('detection_date', models.DateField()),
+                ('detection_time', models.TimeField()),
+                ('confidence', models.FloatField()),
+                ('x1', models.SmallIntegerField()),
+                ('y1', models.SmallIntegerField()),
+                ('x2', models.SmallIntegerField()),
+                ('y2', models.SmallIntegerField()),
+                ('camera', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='detection_boxes', to='camera.camera')),
+                ('detection', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='boxes', to='monitoramento.detection')),
+                ('object_class', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='boxes', to='monitoramento.objectclass')),
+            ],
+            options={
+                'db_table': 'monitoring_detection_boxes',
+                'indexes': [models.Index(fields=['camera', 'detection_date', 'detection_time'], name='monitoring_box_cam_time_idx'), models.Index(fields=['object_class', 'detection_date', 'detection_time'], name='monitoring_box_class_time_idx')],
+            },
+        ),
+        # default só para que a reversão consiga recriar a coluna em tabelas com dados
+        migrations.AlterField(
+            model_name='detection',
+            name='detections',
+            field=models.JSONField(default=list),
+        ),
+        migrations.RunPython(copy_detections, restore_detections),
+        migrations.RemoveField(
+            model_name='detection',
+            name='detections',
+        ),
+    ]
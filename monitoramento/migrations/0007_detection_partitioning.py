@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('camera', '0008_camera_retention_days'),
+        ('monitoramento', '0006_detection_boxes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='detection',
+            name='camera',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='monitoring_detections', to='camera.camera'),
+        ),
+        migrations.AlterField(
+            model_name='detectionbox',
+            name='camera',
+            field=models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='detection_boxes', to='camera.camera'),
+        ),
+        migrations.AlterField(
+            model_name='detectionbox',
+            name='detection',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='boxes', to='monitoramento.detection'),
+        ),
+        migrations.AlterField(
+            model_name='detectionbox',
+            name='object_class',
+            field=models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='boxes', to='monitoramento.objectclass'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('camera', '0008_camera_retention_days'),
+        ('monitoramento', '0007_detection_partitioning'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='detectionbox',
+            index=models.Index(fields=['camera', 'object_class', 'detection_date', 'detection_time'], name='monitoring_box_cam_class_idx'),
+        ),
+    ]
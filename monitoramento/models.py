@@ -1,14 +1,287 @@
-from django.db import models
+import threading
+
+from django.db import NotSupportedError, connections, models, transaction
 from camera.models import Camera
 
+
+class ObjectClassManager(models.Manager):
+    """
+    Consulta de classes por nome e por id, com cache no processo: a tabela
+    inteira é carregada na primeira consulta e só nomes novos vão ao banco
+    """
+
+    _ids = {}
+    _names = {}
+    _model_ids = {}
+    _loaded = False
+    _lock = threading.Lock()
+
+    def clear_cache(self):
+        with self._lock:
+            self._ids.clear()
+            self._names.clear()
+            self._model_ids.clear()
+            ObjectClassManager._loaded = False
+
+    def _load(self):
+        """Carrega todas as classes no cache (chamado com _lock adquirido)"""
+        for pk, name, model_class_id in self.values_list('pk', 'name', 'model_class_id'):
+            self._ids[name] = pk
+            self._names[pk] = name
+            self._model_ids[pk] = model_class_id
+        ObjectClassManager._loaded = True
+
+    def id_for(self, name: str, model_class_id: int = None) -> int:
+        """
+        Id da classe, cadastrando-a no primeiro uso
+        Args:
+            model_class_id: Índice da classe no modelo que a detectou, gravado em model_class_id
+        """
+        class_id = self._ids.get(name)
+        if class_id is not None and (model_class_id is None or self._model_ids.get(class_id) == model_class_id):
+            return class_id
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            class_id = self._ids.get(name)
+            if class_id is None:
+                object_class = self.get_or_create(name=name, defaults={'model_class_id': model_class_id})[0]
+                class_id = object_class.pk
+                self._ids[name] = class_id
+                self._names[class_id] = name
+                self._model_ids[class_id] = object_class.model_class_id
+            if model_class_id is not None and self._model_ids.get(class_id) != model_class_id:
+                self.filter(pk=class_id).update(model_class_id=model_class_id)
+                self._model_ids[class_id] = model_class_id
+        return class_id
+
+    def name_for(self, class_id: int) -> str:
+        name = self._names.get(class_id)
+        if name is None:
+            with self._lock:
+                self._load()
+            name = self._names.get(class_id, '')
+        return name
+
+    def model_id_for(self, class_id: int):
+        """Índice da classe no modelo (None se ainda desconhecido)"""
+        if class_id not in self._names:
+            self.name_for(class_id)
+        return self._model_ids.get(class_id)
+
+
+class ObjectClass(models.Model):
+    """Classes detectadas; as caixas guardam apenas o id (smallint)"""
+    id = models.SmallAutoField(primary_key=True)
+    name = models.CharField(max_length=100, unique=True)
+    # Índice da classe no modelo (ex.: 2 = car no COCO), exposto como class_id na API
+    model_class_id = models.SmallIntegerField(null=True, blank=True)
+
+    objects = ObjectClassManager()
+
+    class Meta:
+        db_table = 'monitoring_object_classes'
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class DetectionManager(models.Manager):
+    # innodb_autoinc_lock_mode por conexão (configuração global, só muda com o MySQL reiniciado)
+    _autoinc_lock_modes = {}
+
+    def bulk_create_with_boxes(self, instances: list) -> list:
+        """
+        Grava os eventos e, em um único bulk_create, as caixas definidas com set_boxes
+        Returns:
+            Os eventos gravados (com detection_id)
+        """
+        connection = connections[self.db]
+        with transaction.atomic(using=self.db):
+            if connection.features.can_return_rows_from_bulk_insert:
+                self.bulk_create(instances)
+            elif connection.vendor == 'mysql':
+                self._mysql_bulk_create(connection, instances)
+            else:
+                raise NotSupportedError(f"{connection.vendor} não retorna os ids de um bulk_create")
+
+            boxes = []
+            for instance in instances:
+                for box in instance.pending_boxes or []:
+                    box.detection_id = instance.pk
+                    box.camera_id = instance.camera_id
+                    box.detection_date = instance.detection_date
+                    box.detection_time = instance.detection_time
+                    boxes.append(box)
+            DetectionBox.objects.using(self.db).bulk_create(boxes)
+        return instances
+
+    def _mysql_bulk_create(self, connection, instances: list):
+        """
+        O MySQL não retorna as linhas de um INSERT com vários VALUES, apenas
+        LAST_INSERT_ID(), o id da primeira linha. Com innodb_autoinc_lock_mode
+        0 ou 1 o InnoDB reserva ids consecutivos (passo auto_increment_increment)
+        para todas as linhas de um mesmo INSERT, então os demais ids são
+        calculados. Com o modo 2 (padrão do MySQL 8) INSERTs simultâneos podem
+        intercalar ids, e cada evento é inserido em um INSERT próprio.
+        """
+        if self._autoinc_lock_mode(connection) in (0, 1):
+            statements = [instances]
+        else:
+            statements = [[instance] for instance in instances]
+        for statement in statements:
+            # bulk_create no MySQL grava a lista inteira em um único INSERT
+            self.bulk_create(statement, batch_size=len(statement))
+            first_id, increment = self._last_insert_id(connection)
+            for index, instance in enumerate(statement):
+                instance.pk = first_id + index * increment
+
+    def _autoinc_lock_mode(self, connection) -> int:
+        mode = self._autoinc_lock_modes.get(connection.alias)
+        if mode is None:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT @@innodb_autoinc_lock_mode')
+                mode = self._autoinc_lock_modes[connection.alias] = int(cursor.fetchone()[0])
+        return mode
+
+    @staticmethod
+    def _last_insert_id(connection):
+        """
+        Returns:
+            Tupla (id da primeira linha do último INSERT da sessão, passo do auto-incremento)
+        """
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT LAST_INSERT_ID(), @@auto_increment_increment')
+            first_id, increment = cursor.fetchone()
+        return int(first_id), int(increment)
+
+
 class Detection(models.Model):
+    """Evento de detecção (um frame gravado); as caixas ficam em DetectionBox"""
     detection_id = models.AutoField(primary_key=True)
-    camera = models.ForeignKey(Camera, on_delete=models.CASCADE, related_name='monitoring_detections')
+    # Sem FK no banco: tabelas particionadas do MySQL não aceitam chaves estrangeiras
+    # (a exclusão em cascata continua sendo feita pelo Django)
+    camera = models.ForeignKey(Camera, on_delete=models.CASCADE, related_name='monitoring_detections',
+                               db_constraint=False)
     detection_date = models.DateField()
     detection_time = models.TimeField()
-    detections = models.JSONField()
+    # Caminho do frame anotado, relativo a SNAPSHOT_ROOT
+    snapshot_path = models.CharField(max_length=255, blank=True, default='')
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = DetectionManager()
+
+    # Caixas ainda não gravadas (set_boxes)
+    pending_boxes = None
+
     class Meta:
         db_table = 'monitoring_detections'
         ordering = ['-detection_date', '-detection_time']
+        indexes = [
+            # Consultas por câmera e intervalo de tempo (paginação por cursor)
+            models.Index(fields=['camera', 'detection_date', 'detection_time'],
+                         name='monitoring_cam_date_time_idx'),
+            models.Index(fields=['detection_date', 'detection_time'],
+                         name='monitoring_date_time_idx'),
+        ]
+
+    def set_boxes(self, detections):
+        """
+        Define as caixas gravadas junto com o evento
+        Args:
+            detections: Lista de dicts com class_name, confidence, bbox [x1, y1, x2, y2]
+                e, opcionalmente, class_id (índice da classe no modelo)
+        """
+        self.pending_boxes = [
+            DetectionBox.from_bbox(ObjectClass.objects.id_for(item['class_name'], item.get('class_id')),
+                                   item['confidence'], item['bbox'])
+            for item in detections
+        ]
+
+    @property
+    def detections(self) -> list:
+        """Caixas no formato da API (use prefetch_related('boxes') em listagens)"""
+        boxes = self.pending_boxes if self.pending_boxes is not None else self.boxes.all()
+        return [box.to_dict() for box in boxes]
+
+
+class DetectionBox(models.Model):
+    """
+    Caixa detectada em um evento. Câmera, data e hora são copiadas do
+    evento para que filtros por câmera ou classe e período usem apenas os
+    índices desta tabela; coordenadas em pixels inteiros.
+    """
+    detection = models.ForeignKey(Detection, on_delete=models.CASCADE, related_name='boxes',
+                                  db_constraint=False)
+    camera = models.ForeignKey(Camera, on_delete=models.CASCADE, related_name='detection_boxes',
+                               db_index=False, db_constraint=False)
+    object_class = models.ForeignKey(ObjectClass, on_delete=models.PROTECT, related_name='boxes',
+                                     db_index=False, db_constraint=False)
+    detection_date = models.DateField()
+    detection_time = models.TimeField()
+    confidence = models.FloatField()
+    x1 = models.SmallIntegerField()
+    y1 = models.SmallIntegerField()
+    x2 = models.SmallIntegerField()
+    y2 = models.SmallIntegerField()
+
+    class Meta:
+        db_table = 'monitoring_detection_boxes'
+        indexes = [
+            models.Index(fields=['camera', 'detection_date', 'detection_time'],
+                         name='monitoring_box_cam_time_idx'),
+            models.Index(fields=['object_class', 'detection_date', 'detection_time'],
+                         name='monitoring_box_class_time_idx'),
+            # Classe em uma câmera e período ("caminhões no portão 2 ontem à noite")
+            models.Index(fields=['camera', 'object_class', 'detection_date', 'detection_time'],
+                         name='monitoring_box_cam_class_idx'),
+        ]
+
+    @classmethod
+    def from_bbox(cls, object_class_id: int, confidence: float, bbox) -> 'DetectionBox':
+        x1, y1, x2, y2 = (min(max(round(value), -32768), 32767) for value in bbox)
+        return cls(object_class_id=object_class_id, confidence=confidence, x1=x1, y1=y1, x2=x2, y2=y2)
+
+    def to_dict(self) -> dict:
+        return {
+            'class_id': ObjectClass.objects.model_id_for(self.object_class_id),
+            'class_name': ObjectClass.objects.name_for(self.object_class_id),
+            'confidence': self.confidence,
+            'bbox': [self.x1, self.y1, self.x2, self.y2],
+        }
+
+
+class DetectionRollup(models.Model):
+    """
+    Contagem de caixas detectadas por câmera, classe e intervalo de tempo
+    (minuto, hora ou dia), atualizada a cada gravação de detecções.
+    Os gráficos de tendência leem apenas esta tabela.
+    """
+
+    GRANULARITY_CHOICES = [
+        ('minute', 'Minuto'),
+        ('hour', 'Hora'),
+        ('day', 'Dia'),
+    ]
+
+    camera = models.ForeignKey(Camera, on_delete=models.CASCADE, related_name='detection_rollups')
+    granularity = models.CharField(max_length=6, choices=GRANULARITY_CHOICES)
+    # Início do intervalo, truncado no fuso do servidor
+    bucket_start = models.DateTimeField()
+    class_name = models.CharField(max_length=100)
+    # Caixas detectadas, registros em que a classe apareceu e maior quantidade em um único registro
+    count = models.PositiveIntegerField(default=0)
+    frames = models.PositiveIntegerField(default=0)
+    max_count = models.PositiveIntegerField(default=0)
+    confidence_sum = models.FloatField(default=0)
+    max_confidence = models.FloatField(default=0)
+
+    class Meta:
+        db_table = 'monitoring_detection_rollups'
+        ordering = ['granularity', 'bucket_start', 'class_name']
+        constraints = [
+            # Também atende às consultas por câmera, granularidade e intervalo
+            models.UniqueConstraint(fields=['camera', 'granularity', 'bucket_start', 'class_name'],
+                                    name='monitoring_rollup_bucket_uniq'),
+        ]
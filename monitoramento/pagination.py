@@ -0,0 +1,82 @@
+import base64
+from datetime import date, time
+
+from django.db.models import Q
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class DetectionCursorPagination(BasePagination):
+    """
+    Paginação por cursor (keyset) das detecções, da mais recente para a mais
+    antiga, ordenada por (detection_date, detection_time, detection_id).
+    Cada página é uma varredura de intervalo no índice, sem OFFSET.
+    """
+
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+    default_limit = 100
+    max_limit = 1000
+    ordering = ('-detection_date', '-detection_time', '-detection_id')
+
+    def get_limit(self, request) -> int:
+        value = request.query_params.get(self.limit_query_param)
+        if value is None:
+            return self.default_limit
+        try:
+            limit = int(value)
+        except ValueError:
+            raise ValueError('Invalid limit. Use a positive integer')
+        if limit < 1:
+            raise ValueError('Invalid limit. Use a positive integer')
+        return min(limit, self.max_limit)
+
+    def encode_cursor(self, detection) -> str:
+        position = (f"{detection.detection_date.isoformat()}|"
+                    f"{detection.detection_time.isoformat()}|{detection.detection_id}")
+        return base64.urlsafe_b64encode(position.encode()).decode()
+
+    def decode_cursor(self, cursor: str):
+        try:
+            position = base64.urlsafe_b64decode(cursor.encode()).decode()
+            date_str, time_str, detection_id = position.split('|')
+            return date.fromisoformat(date_str), time.fromisoformat(time_str), int(detection_id)
+        except (ValueError, UnicodeDecodeError):
+            raise ValueError('Invalid cursor')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            detection_date, detection_time, detection_id = self.decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(detection_date__lt=detection_date) |
+                Q(detection_date=detection_date, detection_time__lt=detection_time) |
+                Q(detection_date=detection_date, detection_time=detection_time,
+                  detection_id__lt=detection_id)
+            )
+
+        # Busca um registro a mais para saber se existe próxima página
+        page = list(queryset.order_by(*self.ordering)[:self.limit + 1])
+        self.has_next = len(page) > self.limit
+        page = page[:self.limit]
+        self.next_cursor = self.encode_cursor(page[-1]) if self.has_next else None
+        return page
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor
+        )
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'next_cursor': self.next_cursor,
+            'results': data,
+        })
+
@@ -0,0 +1,268 @@
+import re
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.db import connections
+
+from camera.models import Camera
+from .export import detection_rows, write_archive
+from .models import Detection, DetectionBox
+
+
+def add_months(month: date, months: int) -> date:
+    """Primeiro dia do mês deslocado em `months` meses"""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"p{month:%Y%m}"
+
+
+class MonthlyPartitions:
+    """
+    Partições mensais RANGE COLUMNS(detection_date) de uma tabela de
+    detecções no MySQL. A partição pAAAAMM guarda as linhas daquele mês e
+    pmax (MAXVALUE) recebe datas além da última partição criada.
+    """
+
+    def __init__(self, model, using: str = 'default'):
+        self.model = model
+        self.table = model._meta.db_table
+        self.connection = connections[using]
+
+    @property
+    def supported(self) -> bool:
+        return self.connection.vendor == 'mysql'
+
+    def quote(self, name: str) -> str:
+        return self.connection.ops.quote_name(name)
+
+    def bounds(self) -> dict:
+        """
+        Returns:
+            {nome da partição: limite superior exclusivo (None = MAXVALUE)}, vazio se não particionada
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT PARTITION_NAME, PARTITION_DESCRIPTION FROM information_schema.PARTITIONS "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL "
+                "ORDER BY PARTITION_ORDINAL_POSITION",
+                [self.table]
+            )
+            rows = cursor.fetchall()
+        return {
+            name: None if description == 'MAXVALUE' else date.fromisoformat(description.strip("'"))
+            for name, description in rows
+        }
+
+    def _definitions(self, first_month: date, last_month: date) -> str:
+        definitions = []
+        month = first_month
+        while month <= last_month:
+            definitions.append(
+                f"PARTITION {partition_name(month)} VALUES LESS THAN ('{add_months(month, 1).isoformat()}')"
+            )
+            month = add_months(month, 1)
+        definitions.append("PARTITION pmax VALUES LESS THAN (MAXVALUE)")
+        return ', '.join(definitions)
+
+    def create(self, first_month: date, last_month: date):
+        """
+        Particiona a tabela (reescreve a tabela inteira; execute fora do horário de pico).
+        A chave primária passa a incluir detection_date, exigência do MySQL
+        para chaves únicas de tabelas particionadas.
+        """
+        pk = self.quote(self.model._meta.pk.column)
+        column = self.quote('detection_date')
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"ALTER TABLE {self.quote(self.table)} DROP PRIMARY KEY, ADD PRIMARY KEY ({pk}, {column}) "
+                f"PARTITION BY RANGE COLUMNS({column}) ({self._definitions(first_month, last_month)})"
+            )
+
+    def extend(self, last_month: date) -> list:
+        """
+        Cria as partições que faltam até last_month, dividindo pmax
+        Returns:
+            Nomes das partições criadas
+        """
+        bounds = [bound for bound in self.bounds().values() if bound is not None]
+        first_month = max(bounds) if bounds else last_month
+        if first_month > last_month:
+            return []
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"ALTER TABLE {self.quote(self.table)} REORGANIZE PARTITION pmax INTO "
+                f"({self._definitions(first_month, last_month)})"
+            )
+        created = []
+        month = first_month
+        while month <= last_month:
+            created.append(partition_name(month))
+            month = add_months(month, 1)
+        return created
+
+    def expired(self, cutoff: date) -> list:
+        """
+        Returns:
+            Lista de (nome, primeiro dia do mês) das partições inteiramente anteriores a cutoff
+        """
+        return [
+            (name, add_months(bound, -1))
+            for name, bound in self.bounds().items()
+            if bound is not None and bound <= cutoff
+        ]
+
+    def drop(self, name: str):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {self.quote(self.table)} DROP PARTITION {self.quote(name)}")
+
+
+def camera_retention() -> dict:
+    """
+    Returns:
+        {pk da câmera: (camera_id, dias mantidos)}; 0 = sem limite
+    """
+    return {
+        pk: (camera_id, settings.DETECTION_RETENTION_DAYS if days is None else days)
+        for pk, camera_id, days in Camera.objects.values_list('pk', 'camera_id', 'retention_days')
+    }
+
+
+class DetectionMaintenance:
+    """
+    Manutenção das tabelas de detecções: no MySQL mantém partições mensais
+    (criadas com antecedência) e descarta meses expirados com DROP PARTITION;
+    câmeras com retenção menor que a das demais, ou bancos sem
+    particionamento, têm as linhas expiradas apagadas em blocos pequenos.
+    Os dados removidos podem ser arquivados antes em CSV compactado ou Parquet.
+    """
+
+    def __init__(self, months_ahead: int = 3, archive_format: str = '', archive_root: str = None,
+                 chunk_size: int = 1000, dry_run: bool = False, log=print):
+        """
+        Args:
+            months_ahead: Meses futuros com partição já criada
+            archive_format: csv, parquet ou vazio (sem arquivamento)
+            archive_root: Diretório dos arquivos gerados
+            chunk_size: Detecções apagadas por DELETE fora das partições descartadas
+            dry_run: Apenas informa o que seria feito
+        """
+        self.months_ahead = months_ahead
+        self.archive_format = archive_format
+        self.archive_root = archive_root
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        self.log = log
+
+    def archive(self, boxes, name: str):
+        """Exporta as caixas antes da remoção, se o arquivamento estiver ativo"""
+        if not self.archive_format or self.dry_run:
+            return None
+        name = f"{name}_{datetime.now():%Y%m%d%H%M%S}"
+        path, count = write_archive(detection_rows(boxes), self.archive_root, name, self.archive_format)
+        if path:
+            self.log(f"{count} caixas arquivadas em {path}")
+        return path
+
+    def maintain_partitions(self, init: bool = False) -> list:
+        """
+        Cria as partições futuras (e, com init, particiona as tabelas ainda não particionadas)
+        Returns:
+            MonthlyPartitions das tabelas particionadas, ou [] se alguma não estiver
+        """
+        this_month = date.today().replace(day=1)
+        last_month = add_months(this_month, self.months_ahead)
+        partitioned = []
+        for model in (Detection, DetectionBox):
+            partitions = MonthlyPartitions(model)
+            if not partitions.supported:
+                return []
+            if partitions.bounds():
+                if not self.dry_run:
+                    created = partitions.extend(last_month)
+                    if created:
+                        self.log(f"{partitions.table}: partições criadas {', '.join(created)}")
+            elif init:
+                oldest = model.objects.order_by('detection_date').values_list('detection_date', flat=True).first()
+                first_month = min(oldest.replace(day=1), this_month) if oldest else this_month
+                self.log(f"{partitions.table}: particionando de {first_month:%Y-%m} a {last_month:%Y-%m}")
+                if not self.dry_run:
+                    partitions.create(first_month, last_month)
+            else:
+                self.log(f"{partitions.table} não está particionada (use --init-partitions)")
+                continue
+            partitioned.append(partitions)
+        return partitioned if len(partitioned) == 2 else []
+
+    def drop_expired_partitions(self, partitioned: list, retention: dict) -> list:
+        """Descarta os meses que já expiraram para todas as câmeras"""
+        days = [days for _, days in retention.values()]
+        if not partitioned or not days or not all(days):
+            return []
+        cutoff = date.today() - timedelta(days=max(days))
+        detections, boxes = partitioned
+        dropped = []
+        for name, month in detections.expired(cutoff):
+            self.log(f"Descartando partição {name} ({month:%Y-%m})")
+            self.archive(
+                DetectionBox.objects.filter(detection_date__gte=month, detection_date__lt=add_months(month, 1)),
+                f"detections_{month:%Y-%m}"
+            )
+            if not self.dry_run:
+                if name in boxes.bounds():
+                    boxes.drop(name)
+                detections.drop(name)
+            dropped.append(name)
+        return dropped
+
+    def delete_expired(self, retention: dict) -> int:
+        """Apaga em blocos as detecções mais antigas que a retenção de cada câmera"""
+        deleted = 0
+        for camera_pk, (camera_id, days) in retention.items():
+            if not days:
+                continue
+            cutoff = date.today() - timedelta(days=days)
+            expired = Detection.objects.filter(camera_id=camera_pk, detection_date__lt=cutoff)
+            if self.dry_run:
+                count = expired.count()
+                if count:
+                    self.log(f"Câmera {camera_id}: {count} detecções anteriores a {cutoff} seriam apagadas")
+                continue
+
+            self.archive(
+                DetectionBox.objects.filter(camera_id=camera_pk, detection_date__lt=cutoff),
+                f"detections_{re.sub(r'[^A-Za-z0-9_.-]', '_', camera_id)}_before_{cutoff:%Y-%m-%d}"
+            )
+            camera_deleted = 0
+            while True:
+                ids = list(expired.order_by('detection_id').values_list('detection_id', flat=True)[:self.chunk_size])
+                if not ids:
+                    break
+                # Blocos curtos mantêm os bloqueios breves; as caixas saem junto (cascata)
+                Detection.objects.filter(detection_id__in=ids).delete()
+                camera_deleted += len(ids)
+            if camera_deleted:
+                self.log(f"Câmera {camera_id}: {camera_deleted} detecções anteriores a {cutoff} apagadas")
+            deleted += camera_deleted
+        return deleted
+
+    def run(self, init_partitions: bool = False) -> dict:
+        retention = camera_retention()
+        partitioned = self.maintain_partitions(init_partitions)
+        dropped = self.drop_expired_partitions(partitioned, retention)
+        deleted = self.delete_expired(retention)
+        return {'partitioned': bool(partitioned), 'dropped_partitions': dropped, 'deleted_detections': deleted}
+
+
+def run_detection_maintenance(**kwargs) -> dict:
+    """Manutenção com a configuração de settings (DETECTION_PARTITION_MONTHS_AHEAD, DETECTION_ARCHIVE_*)"""
+    options = {
+        'months_ahead': settings.DETECTION_PARTITION_MONTHS_AHEAD,
+        'archive_format': settings.DETECTION_ARCHIVE_FORMAT,
+        'archive_root': settings.DETECTION_ARCHIVE_ROOT,
+    }
+    options.update(kwargs)
+    init_partitions = options.pop('init_partitions', False)
+    return DetectionMaintenance(**options).run(init_partitions)
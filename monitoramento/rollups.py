@@ -0,0 +1,155 @@
+from datetime import datetime, timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import DetectionRollup, ObjectClass
+
+GRANULARITIES = ('minute', 'hour', 'day')
+BUCKET_SIZES = {
+    'minute': timedelta(minutes=1),
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1),
+}
+
+
+def truncate(moment: datetime, granularity: str) -> datetime:
+    """Início do intervalo que contém o instante"""
+    if granularity == 'minute':
+        return moment.replace(second=0, microsecond=0)
+    if granularity == 'hour':
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def local_naive(moment: datetime) -> datetime:
+    """Converte para hora local sem fuso, como detection_date/detection_time"""
+    if timezone.is_aware(moment):
+        return timezone.make_naive(moment)
+    return moment
+
+
+def bucket_value(moment: datetime) -> datetime:
+    """Valor gravado em bucket_start (com fuso quando USE_TZ está ativo)"""
+    if settings.USE_TZ and timezone.is_naive(moment):
+        return timezone.make_aware(moment)
+    return moment
+
+
+class RollupBatch:
+    """
+    Acumula em memória os incrementos de um lote de detecções e os aplica
+    com uma atualização por (câmera, granularidade, intervalo, classe).
+    """
+
+    def __init__(self, granularities=GRANULARITIES):
+        self.granularities = granularities
+        # (camera_id, granularidade, início, classe) -> [count, frames, max_count, soma, máx. confiança]
+        self._buckets = {}
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def add(self, camera_id: int, moment: datetime, detections):
+        """
+        Args:
+            camera_id: pk da câmera
+            moment: Data/hora do registro
+            detections: Iterável de (class_name, confidence) das caixas do registro
+        """
+        per_class = {}
+        for class_name, confidence in detections:
+            stats = per_class.setdefault(class_name, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += confidence
+            stats[2] = max(stats[2], confidence)
+
+        moment = local_naive(moment)
+        for granularity in self.granularities:
+            start = truncate(moment, granularity)
+            for class_name, (count, confidence_sum, max_confidence) in per_class.items():
+                key = (camera_id, granularity, start, class_name)
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    self._buckets[key] = [count, 1, count, confidence_sum, max_confidence]
+                else:
+                    bucket[0] += count
+                    bucket[1] += 1
+                    bucket[2] = max(bucket[2], count)
+                    bucket[3] += confidence_sum
+                    bucket[4] = max(bucket[4], max_confidence)
+
+    def apply(self):
+        """Soma os incrementos às linhas existentes, criando as que faltam"""
+        if not self._buckets:
+            return
+        # Ordem fixa das chaves evita deadlocks entre processos gravando ao mesmo tempo
+        buckets = sorted(self._buckets.items())
+        self._buckets = {}
+        with transaction.atomic():
+            DetectionRollup.objects.bulk_create([
+                DetectionRollup(camera_id=camera_id, granularity=granularity,
+                                bucket_start=bucket_value(start), class_name=class_name)
+                for (camera_id, granularity, start, class_name), _ in buckets
+            ], ignore_conflicts=True)
+            for (camera_id, granularity, start, class_name), stats in buckets:
+                count, frames, max_count, confidence_sum, max_confidence = stats
+                DetectionRollup.objects.filter(
+                    camera_id=camera_id,
+                    granularity=granularity,
+                    bucket_start=bucket_value(start),
+                    class_name=class_name
+                ).update(
+                    count=F('count') + count,
+                    frames=F('frames') + frames,
+                    max_count=Greatest('max_count', Value(max_count)),
+                    confidence_sum=F('confidence_sum') + confidence_sum,
+                    max_confidence=Greatest('max_confidence', Value(max_confidence))
+                )
+
+
+def add_monitoring_detections(batch: RollupBatch, rows):
+    """
+    Args:
+        rows: Iterável de (camera_id, detection_date, detection_time, detections),
+            com detections no formato de Detection.detections
+    """
+    for camera_id, detection_date, detection_time, detections in rows:
+        batch.add(
+            camera_id,
+            datetime.combine(detection_date, detection_time),
+            ((item['class_name'], item['confidence']) for item in detections)
+        )
+
+
+def add_detection_boxes(batch: RollupBatch, rows):
+    """
+    Args:
+        rows: Iterável de (detection_id, camera_id, detection_date, detection_time,
+            object_class_id, confidence) de DetectionBox, ordenado por detection_id
+    """
+    for (_, camera_id, detection_date, detection_time), boxes in groupby(rows, key=lambda row: row[:4]):
+        batch.add(
+            camera_id,
+            datetime.combine(detection_date, detection_time),
+            ((ObjectClass.objects.name_for(class_id), confidence) for *_, class_id, confidence in boxes)
+        )
+
+
+def update_rollups(add, rows):
+    """
+    Atualiza os rollups com detecções recém-gravadas
+    Args:
+        add: add_monitoring_detections ou add_detection_boxes
+        rows: Linhas no formato esperado por add
+    """
+    batch = RollupBatch()
+    try:
+        add(batch, rows)
+        batch.apply()
+    except Exception as e:
+        print(f"Erro ao atualizar rollups de detecções: {str(e)}")
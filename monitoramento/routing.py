@@ -0,0 +1,6 @@
+from django.urls import path
+from .consumers import CameraEventsConsumer
+
+websocket_urlpatterns = [
+    path('ws/cameras/<str:camera_id>/', CameraEventsConsumer.as_asgi()),
+]
@@ -1,8 +1,18 @@
+from django.urls import reverse
 from rest_framework import serializers
 from .models import Detection
 
 class DetectionSerializer(serializers.ModelSerializer):
+    # Montado a partir de DetectionBox, no mesmo formato do antigo campo JSON
+    detections = serializers.ReadOnlyField()
+    snapshot_url = serializers.SerializerMethodField()
+
     class Meta:
         model = Detection
         fields = ['detection_id', 'camera', 'detection_date', 
-                 'detection_time', 'detections']
\ No newline at end of file
+                 'detection_time', 'detections', 'snapshot_url']
+
+    def get_snapshot_url(self, obj):
+        if not obj.snapshot_path or obj.detection_id is None:
+            return None
+        return reverse('detection-snapshot', args=[obj.detection_id])
\ No newline at end of file
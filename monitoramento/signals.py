@@ -0,0 +1,35 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from camera.models import Camera
+from .detection_writer import detections_flushed
+from .events import publish_camera_status, publish_detection
+from .models import Detection
+from .rollups import add_monitoring_detections, update_rollups
+
+
+def monitoring_rows(instances):
+    return [
+        (instance.camera_id, instance.detection_date, instance.detection_time, instance.detections)
+        for instance in instances
+    ]
+
+
+@receiver(post_save, sender=Detection)
+def detection_saved(sender, instance, created, **kwargs):
+    # Eventos gravados em lote (bulk_create, sem post_save) são tratados por detections_bulk_saved
+    if created:
+        update_rollups(add_monitoring_detections, monitoring_rows([instance]))
+        publish_detection(instance)
+
+
+@receiver(detections_flushed, sender=Detection)
+def detections_bulk_saved(sender, instances, **kwargs):
+    update_rollups(add_monitoring_detections, monitoring_rows(instances))
+    for instance in instances:
+        publish_detection(instance)
+
+
+@receiver(post_save, sender=Camera)
+def camera_saved(sender, instance, **kwargs):
+    publish_camera_status(instance)
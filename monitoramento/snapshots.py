@@ -0,0 +1,190 @@
+import os
+import re
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+import cv2
+import numpy as np
+from django.conf import settings
+
+
+class SnapshotStore:
+    """
+    Armazenamento dos frames de detecção. A codificação JPEG e a escrita em
+    disco acontecem em um pool de threads, fora do loop de frames. Os arquivos
+    são separados em <raiz>/<câmera>/<AAAA-MM-DD>/ e a retenção remove
+    diretórios de dias inteiros, por idade e por tamanho total. O tamanho de
+    cada dia é lido uma vez, na primeira retenção, e depois atualizado a cada
+    arquivo gravado ou dia removido por este processo.
+    """
+
+    def __init__(self, root: str, max_workers: int = 2, retention_days: int = 30,
+                 max_bytes: int = None, jpeg_quality: int = 90,
+                 max_pending: int = 32, prune_interval: float = 300):
+        """
+        Args:
+            root: Diretório raiz dos snapshots
+            max_workers: Threads de codificação/escrita
+            retention_days: Dias mantidos por câmera (0 = sem limite)
+            max_bytes: Tamanho máximo total em bytes (None = sem limite)
+            max_pending: Snapshots aguardando escrita antes de começar a descartar
+            prune_interval: Intervalo mínimo (s) entre execuções da retenção
+        """
+        self.root = root
+        self.retention_days = retention_days
+        self.max_bytes = max_bytes
+        self.jpeg_quality = jpeg_quality
+        self.max_pending = max_pending
+        self.prune_interval = prune_interval
+        self.written = 0
+        self.dropped = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+        # Bytes por (câmera, dia); None até a primeira retenção
+        self._day_bytes = None
+        self._total_bytes = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='snapshot-writer')
+
+    @staticmethod
+    def _safe_name(value: str) -> str:
+        return re.sub(r'[^A-Za-z0-9_.-]', '_', str(value)) or '_'
+
+    def relative_path(self, camera_key: str, timestamp: datetime, suffix: str = '') -> str:
+        filename = f"detection_{timestamp.strftime('%Y%m%d_%H%M%S_%f')}{suffix}.jpg"
+        return os.path.join(self._safe_name(camera_key), timestamp.strftime('%Y-%m-%d'), filename)
+
+    def absolute_path(self, relative_path: str) -> str:
+        return os.path.join(self.root, relative_path)
+
+    def save(self, camera_key: str, image: np.ndarray, timestamp: datetime = None, suffix: str = ''):
+        """
+        Agenda a gravação de um frame
+        Returns:
+            Caminho relativo à raiz onde o arquivo será escrito, ou None se descartado
+        """
+        timestamp = timestamp or datetime.now()
+        with self._lock:
+            if self._pending >= self.max_pending:
+                # Disco não acompanha: descarta em vez de acumular frames na memória
+                self.dropped += 1
+                return None
+            self._pending += 1
+
+        relative_path = self.relative_path(camera_key, timestamp, suffix)
+        # Copia o frame: o chamador continua desenhando sobre o buffer original
+        self._executor.submit(self._write, relative_path, image.copy())
+        return relative_path
+
+    def _write(self, relative_path: str, image: np.ndarray):
+        try:
+            path = self.absolute_path(relative_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            ret, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            if ret:
+                with open(path, 'wb') as f:
+                    f.write(buffer.tobytes())
+                self.written += 1
+                self._account(relative_path, buffer.nbytes)
+        except Exception as e:
+            print(f"Erro ao salvar snapshot {relative_path}: {str(e)}")
+        finally:
+            with self._lock:
+                self._pending -= 1
+            self._maybe_prune()
+
+    def _maybe_prune(self):
+        with self._lock:
+            if time.monotonic() - self._last_prune < self.prune_interval:
+                return
+            self._last_prune = time.monotonic()
+        try:
+            self.prune()
+        except Exception as e:
+            print(f"Erro ao aplicar retenção de snapshots: {str(e)}")
+
+    def _account(self, relative_path: str, size: int):
+        """Soma um arquivo gravado ao total do dia dele"""
+        camera_key, day = relative_path.split(os.sep)[:2]
+        with self._lock:
+            if self._day_bytes is None:
+                # Ainda sem índice: a varredura inicial contará o arquivo
+                return
+            self._day_bytes[(camera_key, day)] = self._day_bytes.get((camera_key, day), 0) + size
+            self._total_bytes += size
+
+    def _scan(self) -> dict:
+        """Lê o tamanho de cada diretório <câmera>/<AAAA-MM-DD>/"""
+        day_bytes = {}
+        for camera_dir in os.scandir(self.root):
+            if not camera_dir.is_dir():
+                continue
+            for day_dir in os.scandir(camera_dir.path):
+                try:
+                    date.fromisoformat(day_dir.name)
+                except ValueError:
+                    continue
+                if day_dir.is_dir():
+                    day_bytes[(camera_dir.name, day_dir.name)] = sum(
+                        entry.stat().st_size for entry in os.scandir(day_dir.path) if entry.is_file()
+                    )
+        return day_bytes
+
+    def prune(self):
+        """
+        Remove os dias expirados e, se o total passar de max_bytes, os dias
+        mais antigos de todas as câmeras. O dia corrente nunca é removido.
+        """
+        if not os.path.isdir(self.root):
+            return
+        with self._lock:
+            loaded = self._day_bytes is not None
+        if not loaded:
+            day_bytes = self._scan()
+            with self._lock:
+                self._day_bytes = day_bytes
+                self._total_bytes = sum(day_bytes.values())
+
+        today = date.today().isoformat()
+        oldest_kept = (date.today() - timedelta(days=self.retention_days)).isoformat() if self.retention_days else ''
+        with self._lock:
+            # Datas ISO ordenam cronologicamente
+            days = sorted(self._day_bytes, key=lambda key: key[1])
+        for camera_key, day in days:
+            expired = day < oldest_kept
+            over_limit = bool(self.max_bytes) and self._total_bytes > self.max_bytes
+            if day >= today or not (expired or over_limit):
+                break
+            shutil.rmtree(os.path.join(self.root, camera_key, day), ignore_errors=True)
+            with self._lock:
+                self._total_bytes -= self._day_bytes.pop((camera_key, day), 0)
+
+    def metrics(self) -> dict:
+        return {
+            'pending': self._pending,
+            'written': self.written,
+            'dropped': self.dropped,
+            'total_bytes': self._total_bytes if self._day_bytes is not None else None,
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_snapshot_store() -> SnapshotStore:
+    """Armazenamento de snapshots compartilhado do processo"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SnapshotStore(
+                settings.SNAPSHOT_ROOT,
+                max_workers=settings.SNAPSHOT_WORKERS,
+                retention_days=settings.SNAPSHOT_RETENTION_DAYS,
+                max_bytes=settings.SNAPSHOT_MAX_BYTES,
+                jpeg_quality=settings.SNAPSHOT_JPEG_QUALITY
+            )
+        return _store
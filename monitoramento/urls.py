@@ -1,8 +1,13 @@
 from django.urls import path
-from .views import DetectionView, CameraStreamView
+from .views import DetectionView, CameraStreamView, detection_snapshot, detection_writer_metrics, camera_stats, detection_export
 
 urlpatterns = [
     path('detections/', DetectionView.as_view()),
+    path('detections/writer/metrics/', detection_writer_metrics),
+    path('detections/export/', detection_export),
+    path('detections/<int:detection_id>/snapshot/', detection_snapshot, name='detection-snapshot'),
     path('cameras/<str:camera_id>/detections/', DetectionView.as_view()),
+    path('cameras/<str:camera_id>/detections/export/', detection_export),
     path('cameras/<str:camera_id>/stream/', CameraStreamView.as_view()),
+    path('cameras/<str:camera_id>/stats/', camera_stats),
 ]
\ No newline at end of file
@@ -1,69 +1,95 @@
-from .object_detector import ObjectDetector
-import cv2
+from camera.capture import FFmpegFrameReader
+from camera.object_detector import ObjectDetector
+from .snapshots import get_snapshot_store
 import time
 import os
-import shutil
-import subprocess
+import cv2
 import datetime
 
 class VideoFrameExtractor:
-    def __init__(self, stream_url, output_dir="frames", capture_interval=5):
+    def __init__(self, stream_url, output_dir="frames", capture_interval=5, snapshot_key="extractor",
+                 save_annotated=True, save_raw=False):
         """
         Inicializa o extrator de frames
         :param stream_url: URL do stream de vídeo
-        :param output_dir: Diretório para salvar os frames
-        :param capture_interval: Intervalo entre capturas em segundos
+        :param output_dir: Diretório para salvar os frames capturados (apenas com save_raw)
+        :param capture_interval: Intervalo entre capturas em segundos (aceita frações)
+        :param snapshot_key: Diretório dos frames processados no armazenamento de snapshots
+        :param save_annotated: Desenha e salva o frame processado; False apenas lista as detecções
+        :param save_raw: Também grava em output_dir cada frame capturado, sem anotações
         """
         self.stream_url = stream_url
         self.output_dir = output_dir
         self.capture_interval = capture_interval
-        self._setup_output_dir()
+        self.snapshot_key = snapshot_key
+        self.save_annotated = save_annotated
+        self.save_raw = save_raw
+        self.reader = None
+        if self.save_raw:
+            self._setup_output_dir()
 
     def _setup_output_dir(self):
         """Cria o diretório de saída se não existir"""
         if not os.path.exists(self.output_dir):
             os.makedirs(self.output_dir)
 
+    def _open_reader(self):
+        """Abre a sessão de decodificação persistente do stream"""
+        # O ffmpeg entrega apenas a taxa de frames necessária para o intervalo de captura
+        self.reader = FFmpegFrameReader(self.stream_url, fps=1 / self.capture_interval)
+        if not self.reader.isOpened():
+            self.reader.release()
+            self.reader = None
+            print(f"Erro ao conectar ao stream: {self.stream_url}")
+
     def capture_frame(self):
         """
-        Captura um único frame do stream
-        :return: Caminho do arquivo salvo ou None em caso de erro
+        Captura o frame mais recente da sessão de decodificação
+        :return: Frame BGR (numpy) ou None em caso de erro
         """
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_file = os.path.join(self.output_dir, f"frame_{timestamp}.jpg")
-        
-        command = [
-            'ffmpeg',
-            '-y',
-            '-i', self.stream_url,
-            '-vframes', '1',
-            '-f', 'image2',
-            output_file
-        ]
-        
-        try:
-            subprocess.run(command, check=True, capture_output=True)
-            print(f"Frame capturado com sucesso: {output_file}")
-            return output_file
-        except subprocess.CalledProcessError as e:
-            print(f"Erro ao capturar frame: {e}")
+        if self.reader is None:
+            self._open_reader()
+            if self.reader is None:
+                return None
+
+        success, frame = self.reader.read(timeout=self.capture_interval + 10)
+        if not success:
+            # Stream caiu: a próxima captura abre uma nova sessão
+            print("Erro ao capturar frame: stream encerrado")
+            self.reader.release()
+            self.reader = None
             return None
 
+        if self.save_raw:
+            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+            output_file = os.path.join(self.output_dir, f"frame_{timestamp}.jpg")
+            cv2.imwrite(output_file, frame)
+        return frame
+
     def start_capture(self):
         """Inicia o loop de captura de frames"""
         detector = ObjectDetector()
         print(f"Iniciando captura de frames de {self.stream_url}")
         try:
             while True:
-                frame_path = self.capture_frame()
-                if frame_path:
-                    # Processa o frame capturado
-                    annotated_frame, detections = detector.process_image(frame_path)
-                    # Opcional: salvar frame processado
-                    cv2.imwrite(frame_path.replace('.jpg', '_processed.jpg'), annotated_frame)
+                started_at = time.monotonic()
+                frame = self.capture_frame()
+                if frame is not None:
+                    # Processa o frame em memória, sem passar pelo disco
+                    annotated_frame, detections = detector.process_image(
+                        frame, render=self.save_annotated
+                    )
+                    if self.save_annotated:
+                        # Frame processado gravado em segundo plano, com retenção
+                        get_snapshot_store().save(self.snapshot_key, annotated_frame, suffix='_processed')
                     print("Detecções encontradas:")
                     for det in detections:
                         print(f"Classe: {det['class_name']}, Confiança: {det['confidence']:.2f}")
-                time.sleep(self.capture_interval)
+                # Desconta o tempo de captura e inferência do intervalo
+                time.sleep(max(0.0, self.capture_interval - (time.monotonic() - started_at)))
         except KeyboardInterrupt:
-            print("\nCaptura de frames interrompida pelo usuário")
\ No newline at end of file
+            print("\nCaptura de frames interrompida pelo usuário")
+        finally:
+            if self.reader is not None:
+                self.reader.release()
+                self.reader = None
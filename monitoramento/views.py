@@ -1,37 +1,320 @@
-from django.shortcuts import render
+import hashlib
+from asgiref.sync import sync_to_async
+from rest_framework.decorators import api_view, permission_classes, authentication_classes
+from rest_framework.permissions import AllowAny
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from django.http import StreamingHttpResponse
-from camera.services import CameraService
-from .models import Detection
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Max, Sum
+from django.http import FileResponse, Http404, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.http import condition
+from camera.models import Camera
+from camera.stream_hub import StreamUnavailable, stream_hub
+from .detection_writer import get_detection_writer
+from .export import (
+    EXPORT_FORMATS, content_type, detection_rows, export_chunks, export_filename, parquet_available
+)
+from .filters import filter_datetime_range, parse_box_filters, parse_datetime_param
+from .models import Detection, DetectionBox, DetectionRollup
+from .pagination import DetectionCursorPagination
+from .rollups import BUCKET_SIZES, GRANULARITIES, bucket_value, truncate
 from .serializers import DetectionSerializer
-from datetime import datetime
+from .snapshots import get_snapshot_store
+from datetime import datetime, timedelta
 
-class CameraStreamView(APIView):
-    def get(self, request, camera_id):
+class CameraStreamView(View):
+    """
+    Stream MJPEG da câmera. Sob ASGI o stream é servido por um gerador
+    assíncrono, então um único worker atende muitos espectadores sem
+    prender uma thread por conexão; sob WSGI usa o gerador síncrono.
+    """
+
+    async def get(self, request, camera_id):
         try:
-            camera_service = CameraService(camera_id)
+            if not await Camera.objects.filter(camera_id=camera_id).aexists():
+                return JsonResponse({"error": f"Camera {camera_id} not found"}, status=404)
+
+            # Todos os espectadores compartilham o mesmo pipeline da câmera;
+            # a resposta só começa depois do primeiro frame
+            if isinstance(request, ASGIRequest):
+                frames = await stream_hub.astream(camera_id)
+            else:
+                frames = await sync_to_async(stream_hub.stream, thread_sensitive=False)(camera_id)
+
             return StreamingHttpResponse(
-                camera_service.generate_frames(),
+                frames,
                 content_type='multipart/x-mixed-replace; boundary=frame'
             )
+        except StreamUnavailable as e:
+            return JsonResponse({"error": str(e)}, status=503)
         except Exception as e:
-            return Response({"error": str(e)}, status=500)
+            return JsonResponse({"error": str(e)}, status=500)
+
+def newest_detection(request, camera_id=None):
+    """Detecção mais recente da câmera (consultada uma vez por requisição)"""
+    if not hasattr(request, '_newest_detection'):
+        queryset = Detection.objects.all()
+        if camera_id:
+            queryset = queryset.filter(camera__camera_id=camera_id)
+        request._newest_detection = queryset.order_by('-detection_id').values(
+            'detection_id', 'created_at'
+        ).first()
+    return request._newest_detection
+
+
+def detections_etag(request, camera_id=None):
+    newest = newest_detection(request, camera_id)
+    newest_id = newest['detection_id'] if newest else 0
+    # A resposta também depende dos filtros e do cursor
+    key = f"{camera_id}:{newest_id}:{request.META.get('QUERY_STRING', '')}"
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def detections_last_modified(request, camera_id=None):
+    newest = newest_detection(request, camera_id)
+    return newest['created_at'] if newest else None
+
 
 class DetectionView(APIView):
+    pagination_class = DetectionCursorPagination
+
+    @method_decorator(condition(etag_func=detections_etag, last_modified_func=detections_last_modified))
     def get(self, request, camera_id=None):
         date = request.query_params.get('date')
-        queryset = Detection.objects.all()
+        # Caixas da página inteira em uma única consulta
+        queryset = Detection.objects.prefetch_related('boxes')
         
         if camera_id:
             queryset = queryset.filter(camera__camera_id=camera_id)
         
+        date_obj = None
         if date:
             try:
                 date_obj = datetime.strptime(date, '%d/%m/%y').date()
                 queryset = queryset.filter(detection_date=date_obj)
             except ValueError:
                 return Response({"error": "Invalid date format. Use DD/MM/YY"}, status=400)
-                
-        serializer = DetectionSerializer(queryset, many=True)
-        return Response(serializer.data)
+
+        paginator = self.pagination_class()
+        try:
+            # Modo incremental: apenas detecções posteriores à última já vista
+            since_id = request.query_params.get('since_id')
+            if since_id:
+                if not since_id.isdigit():
+                    raise ValueError("Invalid since_id. Use a detection_id")
+                queryset = queryset.filter(detection_id__gt=int(since_id))
+
+            since = parse_datetime_param(request, 'since')
+            until = parse_datetime_param(request, 'until', end_of_day=True)
+            queryset = filter_datetime_range(queryset, since, until)
+
+            # Filtros por classe, confiança e região são resolvidos nos índices
+            # de DetectionBox, com a mesma câmera e o mesmo período
+            box_filters = parse_box_filters(request)
+            if box_filters:
+                boxes = DetectionBox.objects.filter(**box_filters)
+                if camera_id:
+                    boxes = boxes.filter(camera__camera_id=camera_id)
+                if date_obj:
+                    boxes = boxes.filter(detection_date=date_obj)
+                boxes = filter_datetime_range(boxes, since, until)
+                queryset = queryset.filter(detection_id__in=boxes.values('detection_id'))
+
+            if request.query_params.get('count_only', '').lower() in ('1', 'true'):
+                # Apenas o total, sem carregar nem serializar as detecções
+                response = Response({'count': queryset.count()})
+                patch_cache_control(response, no_cache=True)
+                return response
+
+            page = paginator.paginate_queryset(queryset, request, view=self)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        serializer = DetectionSerializer(page, many=True)
+        response = paginator.get_paginated_response(serializer.data)
+        # Obriga o navegador a revalidar (If-None-Match) em vez de usar cache heurístico
+        patch_cache_control(response, no_cache=True)
+        return response
+
+
+def detection_snapshot(request, detection_id):
+    """Frame anotado salvo junto com a detecção"""
+    detection = get_object_or_404(Detection, detection_id=detection_id)
+    if not detection.snapshot_path:
+        raise Http404("Detection has no snapshot")
+    try:
+        path = safe_join(get_snapshot_store().root, detection.snapshot_path)
+        return FileResponse(open(path, 'rb'), content_type='image/jpeg')
+    except (OSError, ValueError):
+        raise Http404("Snapshot not found")
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@authentication_classes([])
+def detection_writer_metrics(request):
+    """Backlog e latência de gravação do gravador de detecções em lote"""
+    return Response(get_detection_writer().metrics())
+
+
+# Período padrão de /stats/ quando since não é informado
+STATS_DEFAULT_RANGES = {
+    'minute': timedelta(hours=6),
+    'hour': timedelta(days=7),
+    'day': timedelta(days=365),
+}
+
+
+def rollup_stats(row: dict) -> dict:
+    return {
+        'count': row['count'],
+        'frames': row['frames'],
+        'max_count': row['max_count'],
+        'avg_confidence': row['confidence_sum'] / row['count'] if row['count'] else 0,
+        'max_confidence': row['max_confidence'],
+    }
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@authentication_classes([])
+def camera_stats(request, camera_id):
+    """
+    Detecções por classe e intervalo, lidas apenas da tabela de rollups
+    Parâmetros: granularity (minute, hour ou day), since/until (ISO 8601)
+    e class_name (repetível ou separado por vírgulas)
+    """
+    camera = Camera.objects.filter(camera_id=camera_id).first()
+    if camera is None:
+        return Response({"error": f"Camera {camera_id} not found"}, status=404)
+
+    granularity = request.query_params.get('granularity', 'hour')
+    if granularity not in GRANULARITIES:
+        return Response({"error": "Invalid granularity. Use minute, hour or day"}, status=400)
+    try:
+        since = parse_datetime_param(request, 'since')
+        until = parse_datetime_param(request, 'until', end_of_day=True)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
+    # Mesmo relógio dos rollups (datetime.now() em CameraService), não o TIME_ZONE do Django
+    until = until or datetime.now()
+    since = truncate(since or until - STATS_DEFAULT_RANGES[granularity], granularity)
+    if since > until:
+        return Response({"error": "since must be before until"}, status=400)
+    if (until - since) / BUCKET_SIZES[granularity] > settings.DETECTION_ROLLUP_MAX_BUCKETS:
+        return Response({
+            "error": f"Range too large for granularity {granularity}. Use a coarser granularity or a shorter range"
+        }, status=400)
+
+    rollups = DetectionRollup.objects.filter(
+        camera=camera,
+        granularity=granularity,
+        bucket_start__gte=bucket_value(since),
+        bucket_start__lte=bucket_value(until)
+    )
+    class_names = [
+        name.strip()
+        for value in request.query_params.getlist('class_name')
+        for name in value.split(',') if name.strip()
+    ]
+    if class_names:
+        rollups = rollups.filter(class_name__in=class_names)
+
+    series = [
+        {'bucket_start': row['bucket_start'], 'class_name': row['class_name'], **rollup_stats(row)}
+        for row in rollups.order_by('bucket_start', 'class_name').values(
+            'bucket_start', 'class_name', 'count', 'frames', 'max_count', 'confidence_sum', 'max_confidence'
+        )
+    ]
+    totals = [
+        {'class_name': row['class_name'], **rollup_stats({
+            'count': row['total_count'],
+            'frames': row['total_frames'],
+            'max_count': row['peak_count'],
+            'confidence_sum': row['total_confidence'],
+            'max_confidence': row['peak_confidence'],
+        })}
+        for row in rollups.order_by().values('class_name').annotate(
+            total_count=Sum('count'),
+            total_frames=Sum('frames'),
+            peak_count=Max('max_count'),
+            total_confidence=Sum('confidence_sum'),
+            peak_confidence=Max('max_confidence')
+        ).order_by('-total_count', 'class_name')
+    ]
+
+    return Response({
+        'camera_id': camera.camera_id,
+        'granularity': granularity,
+        'since': bucket_value(since),
+        'until': bucket_value(until),
+        'totals': totals,
+        'series': series,
+    })
+
+
+async def async_chunks(chunks):
+    """
+    Itera um gerador síncrono sob ASGI bloco a bloco; um iterador síncrono
+    seria consumido inteiro em memória pelo Django antes do envio
+    """
+    iterator = iter(chunks)
+    done = object()
+    while True:
+        chunk = await sync_to_async(next, thread_sensitive=True)(iterator, done)
+        if chunk is done:
+            return
+        yield chunk
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@authentication_classes([])
+def detection_export(request, camera_id=None):
+    """
+    Exporta as caixas detectadas (uma linha por caixa) em streaming, lendo o
+    banco em blocos, com memória constante para qualquer período.
+    Parâmetros: export_format (ndjson, csv ou parquet), gzip, date, since/until
+    e os filtros por caixa de DetectionView (class_name, min_confidence, roi)
+    """
+    export_format = request.query_params.get('export_format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return Response({"error": "Invalid export_format. Use ndjson, csv or parquet"}, status=400)
+    if export_format == 'parquet' and not parquet_available():
+        return Response({"error": "Parquet export requires pyarrow"}, status=501)
+    compress = request.query_params.get('gzip', '').lower() in ('1', 'true')
+
+    boxes = DetectionBox.objects.all()
+    if camera_id:
+        camera = Camera.objects.filter(camera_id=camera_id).first()
+        if camera is None:
+            return Response({"error": f"Camera {camera_id} not found"}, status=404)
+        boxes = boxes.filter(camera=camera)
+
+    date = request.query_params.get('date')
+    if date:
+        try:
+            boxes = boxes.filter(detection_date=datetime.strptime(date, '%d/%m/%y').date())
+        except ValueError:
+            return Response({"error": "Invalid date format. Use DD/MM/YY"}, status=400)
+    try:
+        since = parse_datetime_param(request, 'since')
+        until = parse_datetime_param(request, 'until', end_of_day=True)
+        boxes = filter_datetime_range(boxes, since, until).filter(**parse_box_filters(request))
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
+
+    chunks = export_chunks(detection_rows(boxes), export_format, compress)
+    if isinstance(request._request, ASGIRequest):
+        chunks = async_chunks(chunks)
+    response = StreamingHttpResponse(chunks, content_type=content_type(export_format, compress))
+    filename = export_filename(f"detections_{camera_id or 'all'}_{datetime.now():%Y%m%d_%H%M%S}",
+                               export_format, compress)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
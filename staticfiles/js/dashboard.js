@@ -1,6 +1,13 @@
 const API_BASE_URL = '/api';
+const MAX_DETECTION_EVENTS = 3;
 let CAMERA_ID = null;
 
+// WebSocket de eventos da câmera (detecções e status em tempo real)
+let cameraSocket = null;
+let socketRetryDelay = 1000;
+let socketRetryTimer = null;
+let latestDetections = [];
+
 // Função para inicializar o dashboard
 function initializeDashboard() {
     console.log('Inicializando Chirp Dashboard...');
@@ -99,7 +106,34 @@ function showVideoPlaceholder() {
     }
 }
 
-// Atualizar status da câmera
+// Renderizar status e localização da câmera
+function renderCameraStatus(data) {
+    const statusElement = document.getElementById('cameraStatus');
+    
+    if (statusElement) {
+        statusElement.textContent = data.camera_status || 'Desconhecido';
+        
+        // Atualizar cor do status dot
+        const statusDot = document.querySelector('.status-dot');
+        if (statusDot) {
+            if (data.camera_status === 'active') {
+                statusDot.style.background = '#10b981'; // Verde
+            } else if (data.camera_status === 'error') {
+                statusDot.style.background = '#ef4444'; // Vermelho
+            } else {
+                statusDot.style.background = '#f59e0b'; // Amarelo
+            }
+        }
+    }
+    
+    // Atualizar localização
+    const locationElement = document.getElementById('locationName');
+    if (locationElement && data.camera_loc) {
+        locationElement.textContent = data.camera_loc;
+    }
+}
+
+// Atualizar status da câmera (fallback quando o WebSocket não está disponível)
 async function updateCameraStatus() {
     if (!CAMERA_ID) {
         const statusElement = document.getElementById('cameraStatus');
@@ -114,29 +148,7 @@ async function updateCameraStatus() {
         if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
         
         const data = await response.json();
-        const statusElement = document.getElementById('cameraStatus');
-        
-        if (statusElement) {
-            statusElement.textContent = data.camera_status || 'Desconhecido';
-            
-            // Atualizar cor do status dot
-            const statusDot = document.querySelector('.status-dot');
-            if (statusDot) {
-                if (data.camera_status === 'active') {
-                    statusDot.style.background = '#10b981'; // Verde
-                } else if (data.camera_status === 'error') {
-                    statusDot.style.background = '#ef4444'; // Vermelho
-                } else {
-                    statusDot.style.background = '#f59e0b'; // Amarelo
-                }
-            }
-        }
-        
-        // Atualizar localização
-        const locationElement = document.getElementById('locationName');
-        if (locationElement && data.camera_loc) {
-            locationElement.textContent = data.camera_loc;
-        }
+        renderCameraStatus(data);
         
     } catch (error) {
         console.error('Erro ao buscar status da câmera:', error);
@@ -147,7 +159,34 @@ async function updateCameraStatus() {
     }
 }
 
-// Atualizar detecções
+// Renderizar as detecções mais recentes na tabela
+function renderDetections(detections) {
+    const detectionsBody = document.getElementById('detectionsBody');
+    
+    if (!detectionsBody) return;
+
+    detectionsBody.innerHTML = '';
+    
+    detections.slice(0, MAX_DETECTION_EVENTS).forEach(detection => {
+        if (detection.detections && detection.detections.length > 0) {
+            detection.detections.forEach(obj => {
+                const row = document.createElement('tr');
+                row.innerHTML = `
+                    <td>${detection.detection_date}</td>
+                    <td>${obj.class_name}</td>
+                    <td>${detection.detection_time}</td>
+                `;
+                detectionsBody.appendChild(row);
+            });
+        }
+    });
+
+    if (detectionsBody.children.length === 0) {
+        detectionsBody.innerHTML = '<tr><td colspan="3" style="text-align: center;">Nenhuma detecção encontrada</td></tr>';
+    }
+}
+
+// Atualizar detecções (fallback quando o WebSocket não está disponível)
 async function updateDetections() {
     if (!CAMERA_ID) {
         const detectionsBody = document.getElementById('detectionsBody');
@@ -158,37 +197,12 @@ async function updateDetections() {
     }
 
     try {
-        const response = await fetch(`${API_BASE_URL}/cameras/${CAMERA_ID}/detections/`);
+        const response = await fetch(`${API_BASE_URL}/cameras/${CAMERA_ID}/detections/?limit=${MAX_DETECTION_EVENTS}`);
         if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
         
         const data = await response.json();
-        const detectionsBody = document.getElementById('detectionsBody');
-        
-        if (!detectionsBody) return;
-
-        detectionsBody.innerHTML = '';
-        
-        const latestDetections = Array.isArray(data) ? data.slice(0, 3) : [];
-        
-        if (latestDetections.length > 0) {
-            latestDetections.forEach(detection => {
-                if (detection.detections && detection.detections.length > 0) {
-                    detection.detections.forEach(obj => {
-                        const row = document.createElement('tr');
-                        row.innerHTML = `
-                            <td>${detection.detection_date}</td>
-                            <td>${obj.class_name}</td>
-                            <td>${detection.detection_time}</td>
-                        `;
-                        detectionsBody.appendChild(row);
-                    });
-                }
-            });
-        }
-
-        if (detectionsBody.children.length === 0) {
-            detectionsBody.innerHTML = '<tr><td colspan="3" style="text-align: center;">Nenhuma detecção encontrada</td></tr>';
-        }
+        latestDetections = Array.isArray(data.results) ? data.results : [];
+        renderDetections(latestDetections);
     } catch (error) {
         console.error('Erro ao buscar detecções:', error);
         const detectionsBody = document.getElementById('detectionsBody');
@@ -198,6 +212,65 @@ async function updateDetections() {
     }
 }
 
+// Verifica se os eventos estão chegando pelo WebSocket
+function isSocketOpen() {
+    return cameraSocket !== null && cameraSocket.readyState === WebSocket.OPEN;
+}
+
+// Fechar o WebSocket da câmera atual
+function disconnectCameraSocket() {
+    clearTimeout(socketRetryTimer);
+    if (cameraSocket) {
+        const socket = cameraSocket;
+        cameraSocket = null;
+        socket.onclose = null;
+        socket.close();
+    }
+}
+
+// Conectar ao WebSocket de eventos da câmera selecionada
+function connectCameraSocket() {
+    disconnectCameraSocket();
+    if (!CAMERA_ID || !('WebSocket' in window)) return;
+
+    const cameraId = CAMERA_ID;
+    const protocol = window.location.protocol === 'https:' ? 'wss' : 'ws';
+    const socket = new WebSocket(`${protocol}://${window.location.host}/ws/cameras/${encodeURIComponent(cameraId)}/`);
+    cameraSocket = socket;
+
+    socket.onopen = () => {
+        socketRetryDelay = 1000;
+        console.log('WebSocket conectado para câmera:', cameraId);
+    };
+
+    socket.onmessage = (event) => {
+        const message = JSON.parse(event.data);
+
+        if (message.type === 'snapshot') {
+            renderCameraStatus(message.camera);
+            latestDetections = message.detections || [];
+            renderDetections(latestDetections);
+        } else if (message.type === 'detection') {
+            latestDetections = [message.detection, ...latestDetections].slice(0, MAX_DETECTION_EVENTS);
+            renderDetections(latestDetections);
+        } else if (message.type === 'camera_status') {
+            renderCameraStatus(message.camera);
+        }
+    };
+
+    socket.onclose = () => {
+        if (cameraSocket !== socket) return;
+        cameraSocket = null;
+
+        // Enquanto reconecta, o polling de 5 segundos assume as atualizações
+        console.log(`WebSocket desconectado, reconectando em ${socketRetryDelay / 1000}s`);
+        socketRetryTimer = setTimeout(() => {
+            if (CAMERA_ID === cameraId) connectCameraSocket();
+        }, socketRetryDelay);
+        socketRetryDelay = Math.min(socketRetryDelay * 2, 30000);
+    };
+}
+
 // Simular dados de clima (pode ser integrado com API real)
 function updateWeatherInfo() {
     const days = ['Domingo', 'Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado'];
@@ -242,8 +315,8 @@ function updateDashboard() {
     
     console.log('Atualizando dashboard para câmera:', CAMERA_ID);
     updateCameraFeed();
-    updateCameraStatus();
-    updateDetections();
+    // Status e detecções chegam pelo WebSocket (retrato inicial + eventos)
+    connectCameraSocket();
     updateRiskInfo();
 }
 
@@ -260,6 +333,7 @@ function setupCameraSelectListener() {
                 updateDashboard();
             } else {
                 CAMERA_ID = null;
+                disconnectCameraSocket();
                 showVideoPlaceholder();
                 
                 // Limpar informações
@@ -291,15 +365,9 @@ document.addEventListener('DOMContentLoaded', () => {
     // Configurar informações estáticas
     updateWeatherInfo();
     
-    // Configurar intervalos de atualização
-    if (CAMERA_ID) {
-        updateCameraStatus();
-        updateDetections();
-    }
-    
-    // Atualizar dados automaticamente
+    // Polling apenas como fallback, quando o WebSocket não está conectado
     setInterval(() => {
-        if (CAMERA_ID) {
+        if (CAMERA_ID && !isSocketOpen()) {
             updateCameraStatus();
             updateDetections();
         }